@@ -0,0 +1,155 @@
+"""
+Compares FAISS index types on the catalog embeddings.
+
+    python -m nlp_backend.embeddings.benchmark [--index-prefix data/faiss_index] [--k 10]
+
+For each configuration: recall@k against the exact flat index, p50/p99
+latency of single-query searches, build time and serialized index size.
+Vectors come from the saved index. Queries are the catalog labels encoded
+with the model when sentence-transformers is installed, otherwise catalog
+vectors with added noise (close to, but not exactly on, an indexed vector).
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from nlp_backend.embeddings.indexes import build_index, effective_index_config, resolve_index_config
+from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH, index_prefix_for
+
+DEFAULT_CONFIGS = [
+    {"type": "flat"},
+    {"type": "hnsw", "M": 16, "ef_construction": 100, "ef_search": 32},
+    {"type": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64},
+    {"type": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 128},
+    {"type": "ivf_flat", "nlist": 128, "nprobe": 8},
+    {"type": "ivf_flat", "nlist": 128, "nprobe": 16},
+    {"type": "ivf_pq", "nlist": 128, "m": 64, "nbits": 8, "nprobe": 16},
+    {"type": "ivf_pq", "nlist": 128, "m": 32, "nbits": 8, "nprobe": 16},
+]
+
+
+def load_vectors(index_prefix: str) -> np.ndarray:
+    if os.path.exists(f"{index_prefix}.vectors.npy"):
+        return np.ascontiguousarray(np.load(f"{index_prefix}.vectors.npy"), dtype=np.float32)
+    index = faiss.read_index(f"{index_prefix}.index")
+    if hasattr(index, "make_direct_map"):
+        index.make_direct_map()
+    return np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+
+
+def sample_queries(vectors: np.ndarray, count: int, noise: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    queries = (picked + rng.normal(scale=noise, size=picked.shape)).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def encode_queries(catalog_path: str, count: int) -> Optional[np.ndarray]:
+    """
+    Spanish labels of the first `count` catalog entries, encoded with the
+    backend's model; None if sentence-transformers is not installed.
+    """
+    try:
+        from nlp_backend.embeddings.faiss_backend import FaissBackend
+    except ImportError:
+        return None
+    texts = []
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if len(texts) >= count:
+                break
+            try:
+                label = json.loads(line).get('labels', {}).get('es')
+            except json.JSONDecodeError:
+                continue
+            if label:
+                texts.append(label)
+    return FaissBackend().get_embeddings(texts)
+
+
+def latency_ms(index, queries: np.ndarray, k: int) -> List[float]:
+    # One query per call, as the translation path searches
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q.reshape(1, -1), k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, configs: List[dict], k: int) -> List[Dict]:
+    faiss.omp_set_num_threads(1)
+    exact, _ = build_index(vectors, {"type": "flat"})
+    _, truth = exact.search(queries, k)
+
+    results = []
+    for config in configs:
+        config = resolve_index_config(config)
+        try:
+            start = time.perf_counter()
+            index, used = build_index(vectors, config)
+            build_s = time.perf_counter() - start
+        except ValueError as e:
+            results.append({"config": effective_index_config(config, len(vectors)), "error": str(e)})
+            continue
+        _, found = index.search(queries, k)
+        hits = sum(len(set(found[i]) & set(truth[i])) for i in range(len(queries)))
+        timings = latency_ms(index, queries, k)
+        results.append({
+            "config": used,
+            f"recall@{k}": hits / (len(queries) * k),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p99_ms": float(np.percentile(timings, 99)),
+            "build_s": build_s,
+            "memory_mb": faiss.serialize_index(index).nbytes / (1024 * 1024),
+        })
+    return results
+
+
+def print_table(results: List[Dict], k: int):
+    print(f"{'index':<58} {'recall@' + str(k):>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'MB':>7}")
+    for r in results:
+        label = " ".join(f"{key}={value}" for key, value in r["config"].items())
+        if "error" in r:
+            print(f"{label:<58} {r['error']}")
+            continue
+        print(f"{label:<58} {r[f'recall@{k}']:>9.3f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['build_s']:>8.2f} {r['memory_mb']:>7.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the exact flat index.")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    parser.add_argument("--index-prefix", default=None, help="saved index to take the vectors from (default: next to the catalog)")
+    parser.add_argument("--configs", default=None, help="JSON file with a list of index configurations")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.05, help="noise of sampled queries when the model is not installed")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    prefix = args.index_prefix or index_prefix_for(args.catalog)
+    if not os.path.exists(f"{prefix}.index") and not os.path.exists(f"{prefix}.vectors.npy"):
+        parser.error(f"No saved index at {prefix}.index; start the backend once to build it")
+    vectors = load_vectors(prefix)
+    queries = encode_queries(args.catalog, args.queries)
+    source = "encoded labels"
+    if queries is None:
+        queries = sample_queries(vectors, args.queries, args.noise)
+        source = f"sampled vectors (noise {args.noise})"
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs, 'r') as f:
+            configs = json.load(f)
+
+    results = run(vectors, queries, configs, args.k)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(vectors)} vectors of dimension {vectors.shape[1]}, {len(queries)} queries from {source}")
+        print_table(results, args.k)
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from nlp_backend.services.cache import LRUCache
+from nlp_backend.services.disk_cache import DiskLRU
+from nlp_backend.services.metrics import register_counter, register_gauge
+from nlp_backend.services.registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Query embedding cache settings:
+#   PICTOLINK_EMBEDDING_CACHE_SIZE  vectors kept in memory (0 = off)
+#   PICTOLINK_EMBEDDING_CACHE_DIR   directory of the on-disk tier, shared by
+#                                   workers and kept across restarts (unset = off)
+#   PICTOLINK_EMBEDDING_CACHE_MB    size limit of the on-disk tier
+
+
+class EmbeddingCache:
+    """
+    Normalized query embeddings by model and text, so repeated words and
+    sentences skip the transformer. Lookups go to an in-memory LRU, then to
+    the optional on-disk tier (which refills memory). Texts only have their
+    whitespace collapsed: the models are cased.
+    """
+
+    def __init__(self):
+        self.memory = LRUCache(max_size=int(os.environ.get("PICTOLINK_EMBEDDING_CACHE_SIZE", 8192)))
+        directory = os.environ.get("PICTOLINK_EMBEDDING_CACHE_DIR")
+        self.disk = None
+        if directory:
+            self.disk = DiskLRU(directory, int(float(os.environ.get("PICTOLINK_EMBEDDING_CACHE_MB", 64)) * 1024 * 1024))
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return ' '.join(text.split())
+
+    @staticmethod
+    def _disk_key(model_key: str, text: str) -> str:
+        return hashlib.sha1(f"{model_key}\0{text}".encode('utf-8')).hexdigest() + ".f32"
+
+    def get(self, model_key: str, text: str, dimension: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        The cached vector or None. Disk entries of another `dimension` than
+        given (partial or foreign files) count as misses.
+        """
+        text = self.make_key(text)
+        vector = self.memory.get((model_key, text))
+        if vector is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return vector
+        if self.disk is not None:
+            data = self.disk.get(self._disk_key(model_key, text))
+            if data is not None and (len(data) % 4 or (dimension is not None and len(data) != dimension * 4)):
+                logger.warning(f"Ignoring embedding cache entry of {len(data)} bytes")
+                data = None
+            if data is not None:
+                vector = np.frombuffer(data, dtype=np.float32)
+                self.memory.put((model_key, text), vector)
+                with self._lock:
+                    self.disk_hits += 1
+                return vector
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model_key: str, text: str, vector: np.ndarray):
+        text = self.make_key(text)
+        # Own read-only copy: callers may modify the encoder's output array
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        self.memory.put((model_key, text), vector)
+        if self.disk is not None:
+            try:
+                self.disk.put(self._disk_key(model_key, text), vector.tobytes())
+            except OSError as e:
+                logger.warning(f"Could not write embedding cache entry: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "size": self.memory.stats()["size"],
+                "max_size": self.memory.max_size,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.memory.evictions,
+            }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+def _embedding_samples(names: tuple) -> dict:
+    cache = registry.peek(EmbeddingCache)
+    stats = cache.stats() if cache is not None else {}
+    return {(name,): value for name, value in stats.items() if name in names}
+
+
+register_gauge("pictolink_embedding_cache", "Query embedding cache size.", ("stat",), lambda: _embedding_samples(("size",)))
+register_counter(
+    "pictolink_embedding_cache_events_total",
+    "Query embedding cache hits (memory and disk), misses and evictions.",
+    ("event",),
+    lambda: _embedding_samples(("memory_hits", "disk_hits", "misses", "evictions")),
+)
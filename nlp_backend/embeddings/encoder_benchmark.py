@@ -0,0 +1,116 @@
+"""
+Compares the embedding runtimes of encoders.py on this machine.
+
+    python -m nlp_backend.embeddings.encoder_benchmark [--runtimes torch,int8,onnx,onnx_int8]
+
+For each runtime: p50/p99 latency of single-text encodes (the query path),
+throughput of batch encodes (catalog indexing) and cosine similarity of its
+embeddings to the PyTorch ones. Texts are the Spanish catalog labels plus a
+few sentences.
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from nlp_backend.embeddings.encoders import (
+    PARITY_THRESHOLDS, RUNTIMES, configured_model_name, cosine_parity, encode_normalized, load_encoder,
+)
+from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH
+
+SENTENCES = [
+    "quiero beber agua",
+    "tengo que ir al baño",
+    "mamá, tengo hambre",
+    "me duele la cabeza",
+    "vamos al parque después del colegio",
+    "no me gusta la sopa",
+    "¿puedes ayudarme a lavarme los dientes?",
+    "ayer comí una hamburguesa con mi abuelo",
+]
+
+
+def sample_texts(catalog_path: str, count: int) -> List[str]:
+    texts = list(SENTENCES)
+    try:
+        with open(catalog_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if len(texts) >= count:
+                    break
+                label = json.loads(line).get('labels', {}).get('es')
+                if label:
+                    texts.append(label)
+    except (OSError, json.JSONDecodeError):
+        pass
+    return texts[:count]
+
+
+def measure(model, texts: List[str], batch_size: int) -> Dict:
+    encode_normalized(model, texts[:8])  # warm-up
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        encode_normalized(model, [text])
+        timings.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    embeddings = encode_normalized(model, texts, batch_size=batch_size)
+    batch_s = time.perf_counter() - start
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "texts_per_s": len(texts) / batch_s,
+        "embeddings": embeddings,
+    }
+
+
+def run(model_name: str, runtimes: List[str], texts: List[str], batch_size: int) -> List[Dict]:
+    reference = None
+    results = []
+    for runtime in ["torch"] + [r for r in runtimes if r != "torch"]:
+        model, used = load_encoder(model_name, runtime)
+        if used != runtime:
+            results.append({"runtime": runtime, "error": "not available"})
+            continue
+        result = measure(model, texts, batch_size)
+        embeddings = result.pop("embeddings")
+        if reference is None:
+            reference = embeddings
+        parity = cosine_parity(reference, embeddings)
+        result.update(
+            runtime=runtime,
+            cosine_mean=float(parity.mean()),
+            cosine_min=float(parity.min()),
+            parity_ok=bool(parity.min() >= PARITY_THRESHOLDS[runtime]),
+        )
+        if runtime in runtimes:
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding runtimes against the PyTorch model.")
+    parser.add_argument("--model", default=configured_model_name())
+    parser.add_argument("--runtimes", default=",".join(RUNTIMES))
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    parser.add_argument("--texts", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    texts = sample_texts(args.catalog, args.texts)
+    results = run(args.model, args.runtimes.split(","), texts, args.batch_size)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{args.model}, {len(texts)} texts")
+        print(f"{'runtime':<10} {'p50 ms':>8} {'p99 ms':>8} {'texts/s':>9} {'cos mean':>9} {'cos min':>8}  parity")
+        for r in results:
+            if "error" in r:
+                print(f"{r['runtime']:<10} {r['error']}")
+                continue
+            print(
+                f"{r['runtime']:<10} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['texts_per_s']:>9.1f} "
+                f"{r['cosine_mean']:>9.4f} {r['cosine_min']:>8.4f}  {'ok' if r['parity_ok'] else 'FAIL'}"
+            )
@@ -0,0 +1,103 @@
+"""
+Sentence encoders for the semantic search, with faster CPU runtimes.
+
+PICTOLINK_EMBEDDING_RUNTIME selects how the model runs:
+    torch       the PyTorch model as published (default)
+    int8        PyTorch with dynamic int8 quantization of the linear layers
+    onnx        the transformer exported to ONNX, run with ONNX Runtime
+    onnx_int8   the ONNX export with dynamic int8 quantization
+
+The ONNX runtimes need sentence-transformers >= 3.2 with
+optimum[onnxruntime]. The export is done once and kept in
+PICTOLINK_ONNX_DIR (default data/onnx). PICTOLINK_ONNX_QUANTIZATION names the
+onnx_int8 target (avx2, avx512, avx512_vnni or arm64). If a runtime cannot be
+loaded, the PyTorch model is used.
+"""
+import logging
+import os
+from typing import Tuple
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from nlp_backend.embeddings.indexes import load_embeddings_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "distiluse-base-multilingual-cased-v2"
+RUNTIMES = ("torch", "int8", "onnx", "onnx_int8")
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'onnx')
+
+# Lowest cosine similarity to the PyTorch embeddings accepted per runtime
+PARITY_THRESHOLDS = {"torch": 1.0 - 1e-6, "onnx": 0.999, "int8": 0.97, "onnx_int8": 0.97}
+
+
+def configured_model_name() -> str:
+    return load_embeddings_config().get("model_name", DEFAULT_MODEL_NAME)
+
+
+def configured_runtime() -> str:
+    runtime = os.environ.get("PICTOLINK_EMBEDDING_RUNTIME", "torch")
+    if runtime not in RUNTIMES:
+        logger.warning(f"Unknown embedding runtime '{runtime}', expected one of {RUNTIMES}; using torch")
+        return "torch"
+    return runtime
+
+
+def load_encoder(model_name: str, runtime: str = None) -> Tuple[SentenceTransformer, str]:
+    """
+    The model for `runtime` (default: configured_runtime()) and the runtime
+    actually used, which is torch when the requested one is unavailable.
+    """
+    runtime = runtime or configured_runtime()
+    if runtime != "torch":
+        try:
+            return _LOADERS[runtime](model_name), runtime
+        except Exception as e:
+            logger.warning(f"Cannot use the {runtime} runtime for {model_name}, falling back to torch: {e}")
+    return SentenceTransformer(model_name), "torch"
+
+
+def _load_int8(model_name: str) -> SentenceTransformer:
+    import torch
+
+    model = SentenceTransformer(model_name, device="cpu")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _export_dir(model_name: str) -> str:
+    return os.path.join(os.environ.get("PICTOLINK_ONNX_DIR", DEFAULT_ONNX_DIR), model_name.replace('/', '__'))
+
+
+def _load_onnx(model_name: str) -> SentenceTransformer:
+    export_dir = _export_dir(model_name)
+    if os.path.exists(os.path.join(export_dir, "onnx", "model.onnx")):
+        return SentenceTransformer(export_dir, backend="onnx", device="cpu")
+    logger.info(f"Exporting {model_name} to ONNX in {export_dir}...")
+    model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+    model.save_pretrained(export_dir)
+    return model
+
+
+def _load_onnx_int8(model_name: str) -> SentenceTransformer:
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    target = os.environ.get("PICTOLINK_ONNX_QUANTIZATION", "avx2")
+    export_dir = _export_dir(model_name)
+    file_name = f"onnx/model_qint8_{target}.onnx"
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        logger.info(f"Quantizing the ONNX export of {model_name} for {target}...")
+        export_dynamic_quantized_onnx_model(_load_onnx(model_name), target, export_dir, file_suffix=f"qint8_{target}")
+    return SentenceTransformer(export_dir, backend="onnx", device="cpu", model_kwargs={"file_name": file_name})
+
+
+_LOADERS = {"int8": _load_int8, "onnx": _load_onnx, "onnx_int8": _load_onnx_int8}
+
+
+def encode_normalized(model: SentenceTransformer, texts, batch_size: int = 32) -> np.ndarray:
+    return model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    # Row-wise cosine similarity of two normalized embedding matrices
+    return np.sum(reference * candidate, axis=1)
@@ -1,20 +1,70 @@
+import copy
+import hashlib
 import os
 import json
+import logging
 import numpy as np
 import faiss
-from typing import List, Dict, Tuple, Optional
-from sentence_transformers import SentenceTransformer
+from typing import Iterable, List, Dict, Mapping, Tuple, Optional
+import sentence_transformers
+from nlp_backend.embeddings.cache import EmbeddingCache
+from nlp_backend.embeddings.encoders import configured_model_name, load_encoder
+from nlp_backend.embeddings.indexes import (
+    SEARCH_PARAMS, build_index, configure_search, effective_index_config, load_embeddings_config,
+    load_index_config, resolve_index_config, supports_removal,
+)
 from nlp_backend.embeddings.interface import SemanticSearchEngine
 from nlp_backend.services.catalog import Pictogram
 
+logger = logging.getLogger(__name__)
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def _checksum(picto_ids: List[int], fingerprints: List[Optional[str]]) -> str:
+    # Identifies the indexed (pictogram, text) pairs
+    digest = hashlib.sha1()
+    for pid, fp in sorted(zip(picto_ids, fingerprints)):
+        digest.update(f"{pid}:{fp};".encode('utf-8'))
+    return digest.hexdigest()
+
+def _index_matches(index, picto_ids: List[int]) -> bool:
+    # The index file holds exactly the rows of the metadata
+    if index.ntotal != len(picto_ids):
+        return False
+    if hasattr(index, "id_map"):
+        return set(faiss.vector_to_array(index.id_map).tolist()) == set(picto_ids)
+    return True
+
 class FaissBackend(SemanticSearchEngine):
-    def __init__(self, model_name: str = "distiluse-base-multilingual-cased-v2"):
-        print(f"Loading SentenceTransformer model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+    """
+    Semantic search over the catalog. The FAISS index is wrapped in an
+    IndexIDMap whose labels are pictogram ids, so single pictograms can be
+    added and removed. Next to it, `embeddings` keeps the normalized vectors
+    (row i belongs to `picto_ids[i]`) and `fingerprints` a digest of the
+    text each one was encoded from, to find entries whose text changed.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, index_config: Optional[dict] = None):
+        config = load_embeddings_config()
+        model_name = model_name or configured_model_name()
+        logger.info(f"Loading SentenceTransformer model: {model_name}...")
+        self.model, self.runtime = load_encoder(model_name)
+        self.model_name = model_name
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        if config.get("model_name") == model_name and config.get("embedding_dim", self.dimension) != self.dimension:
+            logger.warning(f"Embeddings config says dimension {config['embedding_dim']}, {model_name} has {self.dimension}")
+        # Cached query vectors are only valid for the model that made them
+        self.model_key = f"{model_name}:{self.dimension}:{self.runtime}:{sentence_transformers.__version__}"
+        self.query_cache = EmbeddingCache.get_instance()
+        self.index_config = resolve_index_config(index_config) if index_config else load_index_config()
         self.index = None
-        self.pictograms: List[Pictogram] = []
-        self.id_map: Dict[int, int] = {} # FAISS index ID -> Pictogram ID
-        print("Model loaded.")
+        self.picto_ids: List[int] = [] # Row -> Pictogram ID
+        self.fingerprints: List[Optional[str]] = [] # Row -> digest of the encoded text (None = unknown)
+        self.id_map: Dict[int, int] = {} # Pictogram ID -> row
+        self.embeddings: Optional[np.ndarray] = None # Row i = vector of picto_ids[i]
+        self.catalog: Mapping[int, Pictogram] = {} # Pictogram ID -> Pictogram
+        logger.info(f"Model loaded ({self.runtime} runtime).")
 
     def _get_text_representation(self, picto: Pictogram) -> str:
         """
@@ -32,52 +82,150 @@ class FaissBackend(SemanticSearchEngine):
         return " ".join(texts)
 
     def index_catalog(self, pictograms: List[Pictogram]):
-        print(f"Indexing {len(pictograms)} pictograms...")
-        self.pictograms = pictograms
-        self.id_map = {p.id: i for i, p in enumerate(pictograms)}
-        
-        texts = [self._get_text_representation(p) for p in pictograms]
-        
-        # Encode texts
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=True)
+        logger.info(f"Indexing {len(pictograms)} pictograms...")
+        self.index = None
+        self.picto_ids, self.fingerprints, self.id_map = [], [], {}
+        self.embeddings = None
+        self.sync({p.id: p for p in pictograms})
+        logger.info(f"{self.index_config['type']} index built with {self.index.ntotal} vectors.")
+
+    def sync(self, catalog: Mapping[int, Pictogram], changed_ids: Iterable[int] = ()) -> Dict[str, int]:
+        """
+        Brings the index in line with `catalog`: pictograms it no longer has
+        are removed, new ones and those whose text changed (or listed in
+        `changed_ids`) are encoded and added. Everything else keeps its
+        vector. Returns the number of vectors removed and added.
+        """
+        texts = {pid: self._get_text_representation(catalog[pid]) for pid in catalog}
+        prints = {pid: _fingerprint(text) for pid, text in texts.items()}
+        changed = set(changed_ids)
+        stale = [
+            pid for row, pid in enumerate(self.picto_ids)
+            if pid not in prints or pid in changed
+            or (self.fingerprints[row] is not None and self.fingerprints[row] != prints[pid])
+        ]
+        stale_set = set(stale)
+        new = [pid for pid in catalog if pid not in self.id_map or pid in stale_set]
+        self.catalog = catalog
+        if not stale and not new and self.index is not None:
+            return {"removed": 0, "added": 0}
         
-        # Normalize for cosine similarity
+        rebuild = self.index is None
+        if stale:
+            keep = np.array([pid not in stale_set for pid in self.picto_ids], dtype=bool)
+            if not rebuild and supports_removal(self.index_config):
+                self.index.remove_ids(np.array(stale, dtype=np.int64))
+            else:
+                rebuild = True
+            self.embeddings = self.embeddings[keep]
+            self.picto_ids = [pid for pid, k in zip(self.picto_ids, keep) if k]
+            self.fingerprints = [fp for fp, k in zip(self.fingerprints, keep) if k]
+            
+        if new:
+            vectors = self._encode([texts[pid] for pid in new])
+            if not rebuild:
+                self.index.add_with_ids(vectors, np.array(new, dtype=np.int64))
+            self.embeddings = vectors if self.embeddings is None else np.concatenate([self.embeddings, vectors])
+            self.picto_ids = self.picto_ids + new
+            self.fingerprints = self.fingerprints + [prints[pid] for pid in new]
+            
+        self.id_map = {pid: row for row, pid in enumerate(self.picto_ids)}
+        if not self.picto_ids:
+            self.index, self.embeddings = None, None
+        elif rebuild:
+            self.index, self.index_config = build_index(
+                np.ascontiguousarray(self.embeddings, dtype=np.float32), self.index_config, np.array(self.picto_ids, dtype=np.int64),
+            )
+        logger.info(f"Semantic index synced: {len(stale)} removed, {len(new)} encoded and added")
+        return {"removed": len(stale), "added": len(new)}
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # Catalog texts bypass the query cache
+        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=len(texts) > 1000)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        # Normalize for cosine similarity (inner product on unit vectors)
         faiss.normalize_L2(embeddings)
-        
-        # Create FAISS index
-        dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension) # Inner Product + Normalized = Cosine Similarity
-        self.index.add(embeddings)
-        
-        print(f"Index built with {self.index.ntotal} vectors.")
+        return embeddings
+
+    def updated(self, catalog: Mapping[int, Pictogram], changed_ids: Iterable[int] = ()) -> 'FaissBackend':
+        """
+        New backend over `catalog` that shares this one's model, synced from
+        a copy of this index. This backend is left untouched, so searches in
+        flight keep working during the update.
+        """
+        engine = copy.copy(self)
+        if self.index is not None:
+            engine.index = faiss.clone_index(self.index)
+        engine.sync(catalog, changed_ids)
+        return engine
+
+    def reloaded(self, path_prefix: str, catalog: Mapping[int, Pictogram]) -> 'FaissBackend':
+        """
+        New backend sharing this one's model, with the index saved at
+        `path_prefix` and linked to `catalog`. Nothing is encoded: pictograms
+        the saved index lacks are left out of semantic results. Falls back to
+        this backend's index if the saved one cannot be loaded.
+        """
+        engine = copy.copy(self)
+        if not engine.load(path_prefix):
+            engine = copy.copy(self)
+        engine.link_pictograms(catalog)
+        return engine
+
+    def catalog_checksum(self) -> str:
+        return _checksum(self.picto_ids, self.fingerprints)
 
     def search(self, query: str, limit: int = 10) -> List[Tuple[Pictogram, float]]:
         if not self.index:
             return []
+        return self.search_batch([query], limit)[0]
+
+    def search_batch(self, queries: List[str], limit: int = 10) -> List[List[Tuple[Pictogram, float]]]:
+        if not self.index:
+            return [[] for _ in queries]
+        if not queries:
+            return []
             
-        # Encode query
-        query_embedding = self.model.encode([query], convert_to_numpy=True)
-        faiss.normalize_L2(query_embedding)
+        # Encode all queries at once
+        query_embeddings = self.get_embeddings(queries)
         
         # Search
-        distances, indices = self.index.search(query_embedding, limit)
+        distances, indices = self.index.search(query_embeddings, limit)
         
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx != -1 and idx < len(self.pictograms):
-                score = float(distances[0][i])
-                picto = self.pictograms[idx]
-                results.append((picto, score))
+        # Labels are pictogram ids; ids the catalog no longer has are skipped
+        batch_results = []
+        for row in range(len(queries)):
+            results = []
+            for i, pid in enumerate(indices[row].tolist()):
+                if pid != -1 and pid in self.catalog:
+                    results.append((self.catalog[pid], float(distances[row][i])))
+            batch_results.append(results)
                 
-        return results
+        return batch_results
 
     def get_embedding(self, text: str) -> np.ndarray:
         """
         Helper to get embedding for a single text (used for re-ranking).
         """
-        embedding = self.model.encode([text], convert_to_numpy=True)
-        faiss.normalize_L2(embedding)
-        return embedding[0]
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Normalized embeddings for several texts. Texts seen before come from
+        the query cache; the rest are encoded in one forward pass.
+        """
+        cached = [self.query_cache.get(self.model_key, text, self.dimension) for text in texts]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if missing:
+            encoded = self.model.encode(missing, convert_to_numpy=True)
+            faiss.normalize_L2(encoded)
+            fresh = dict(zip(missing, encoded))
+            for text, vector in fresh.items():
+                self.query_cache.put(self.model_key, text, vector)
+            if len(missing) == len(texts):
+                return encoded
+            cached = [fresh[text] if vector is None else vector for text, vector in zip(texts, cached)]
+        return np.stack(cached).astype(np.float32, copy=False)
         
     def get_vector_by_id(self, picto_id: int) -> Optional[np.ndarray]:
         """
@@ -87,69 +235,188 @@ class FaissBackend(SemanticSearchEngine):
             return None
             
         idx = self.id_map[picto_id]
+        if self.embeddings is None:
+            return None
+        # A view of the (possibly memory-mapped) matrix, not a copy
+        return self.embeddings[idx]
+
+    def get_vectors(self, picto_ids: List[int], texts: List[str]) -> np.ndarray:
+        """
+        Embedding matrix for several pictograms (one row each). Rows come
+        from the preloaded matrix; pictograms without a stored vector are
+        encoded from `texts` in a single batch.
+        """
+        rows = [self.id_map.get(pid) for pid in picto_ids]
+        missing = [k for k, row in enumerate(rows) if row is None or self.embeddings is None]
+        
+        if not missing:
+            return self.embeddings[rows]
+            
+        vectors = np.zeros((len(picto_ids), self.dimension), dtype=np.float32)
+        found = [k for k, row in enumerate(rows) if row is not None and self.embeddings is not None]
+        if found:
+            vectors[found] = self.embeddings[[rows[k] for k in found]]
+        vectors[missing] = self.get_embeddings([texts[k] for k in missing])
+        return vectors
+
+    def _load_embedding_matrix(self, path_prefix: str, count: int) -> Optional[np.ndarray]:
+        # Vectors are mapped read-only: no copy, pages shared by the workers,
+        # exact even for ivf_pq
+        matrix_path = f"{path_prefix}.vectors.npy"
+        if not os.path.exists(matrix_path):
+            return None
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Cannot map {matrix_path}: {e}")
+            return None
+        if matrix.shape != (count, self.dimension) or matrix.dtype != np.float32:
+            logger.warning(f"{matrix_path} does not match the index metadata, ignoring it")
+            return None
+        return matrix
+
+    def _load_row_ids(self, path_prefix: str, picto_ids: List[int]) -> Optional[List[int]]:
+        # Row -> pictogram id, mapped from .ids.npy; it must agree with the
+        # metadata, or the vectors may belong to other pictograms
+        ids_path = f"{path_prefix}.ids.npy"
+        if not os.path.exists(ids_path):
+            return picto_ids
         try:
-            # Reconstruct vector from FAISS index
-            vector = self.index.reconstruct(idx)
-            # Ensure it's a numpy array (FAISS might return float array)
-            return np.array(vector)
+            row_ids = np.load(ids_path, mmap_mode='r')
         except Exception as e:
-            print(f"Error retrieving vector for ID {picto_id}: {e}")
+            logger.warning(f"Cannot map {ids_path}: {e}")
+            return None
+        if row_ids.shape != (len(picto_ids),) or not np.array_equal(row_ids, np.asarray(picto_ids, dtype=np.int64)):
+            logger.warning(f"{ids_path} does not match the index metadata")
             return None
+        return row_ids.tolist()
+
+    def _save_matrix(self, path_prefix: str):
+        """
+        Writes the embedding matrix and the pictogram id of each row as .npy
+        files. They are replaced, not overwritten, so a process still mapping
+        the old files is unaffected.
+        """
+        row_ids = np.array(self.picto_ids, dtype=np.int64)
+        for suffix, array in (("vectors", np.asarray(self.embeddings, dtype=np.float32)), ("ids", row_ids)):
+            path = f"{path_prefix}.{suffix}.npy"
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
 
     def save(self, path_prefix: str):
         if not self.index:
             return
             
-        # Save FAISS index
+        # Every file is written aside and renamed into place, the metadata
+        # last; load() checks that the files it finds belong together
         index_path = f"{path_prefix}.index"
-        faiss.write_index(self.index, index_path)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, index_path)
+        self._save_matrix(path_prefix)
         
-        # Save metadata (mapping from index ID to Pictogram ID)
+        # Metadata: what the index was built from and with
         meta_path = f"{path_prefix}.meta.json"
         meta = {
-            "picto_ids": [p.id for p in self.pictograms if p is not None]
+            "model": self.model_name,
+            "dimension": self.dimension,
+            "runtime": self.runtime,
+            "catalog_checksum": self.catalog_checksum(),
+            "index": self.index_config,
+            "picto_ids": self.picto_ids,
+            "fingerprints": self.fingerprints,
         }
-        with open(meta_path, 'w') as f:
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
             
-        print(f"Index saved to {index_path}")
+        logger.info(f"Index saved to {index_path}")
 
     def load(self, path_prefix: str) -> bool:
+        """
+        Loads a saved index if it was encoded with this model and runtime.
+        The FAISS index is rebuilt from the saved vectors, without
+        re-encoding, when its file is missing or the configured index type
+        differs, or it does not hold the rows of the metadata. Metadata whose
+        catalog checksum does not match its own pictogram list is rejected.
+        Call `sync` with the catalog afterwards to pick up catalog changes.
+        """
         index_path = f"{path_prefix}.index"
         meta_path = f"{path_prefix}.meta.json"
         
-        if not os.path.exists(index_path) or not os.path.exists(meta_path):
+        if not os.path.exists(meta_path):
             return False
             
         try:
-            self.index = faiss.read_index(index_path)
             with open(meta_path, 'r') as f:
                 meta = json.load(f)
-                self.loaded_picto_ids = meta["picto_ids"] # Store for later linking
-            print(f"Index loaded from {index_path}")
+            if meta.get("model") != self.model_name or meta.get("dimension") != self.dimension:
+                logger.warning(
+                    f"Saved index was built with {meta.get('model')} ({meta.get('dimension')} dims), "
+                    f"not {self.model_name} ({self.dimension} dims); rebuilding it"
+                )
+                return False
+            # Quantized runtimes give slightly different vectors; queries
+            # must be compared with vectors from the same runtime
+            if meta.get("runtime", "torch") != self.runtime:
+                logger.warning(
+                    f"Saved index was encoded with the {meta.get('runtime', 'torch')} runtime, "
+                    f"not {self.runtime}; rebuilding it"
+                )
+                return False
+            picto_ids = self._load_row_ids(path_prefix, [int(pid) for pid in meta["picto_ids"]])
+            if picto_ids is None:
+                logger.warning(f"Saved pictogram ids at {path_prefix} are inconsistent; rebuilding the index")
+                return False
+            fingerprints = meta.get("fingerprints") or [None] * len(picto_ids)
+            checksum = _checksum(picto_ids, fingerprints) if len(fingerprints) == len(picto_ids) else None
+            if checksum is None or meta.get("catalog_checksum", checksum) != checksum:
+                logger.warning(f"Index metadata at {meta_path} does not match its catalog checksum; rebuilding the index")
+                return False
+            embeddings = self._load_embedding_matrix(path_prefix, len(picto_ids))
+            if embeddings is None:
+                logger.warning(f"Saved vectors at {path_prefix} are missing or incomplete; rebuilding the index")
+                return False
+            
+            self.picto_ids, self.fingerprints, self.embeddings = picto_ids, fingerprints, embeddings
+            self.id_map = {pid: row for row, pid in enumerate(picto_ids)}
+            saved = meta.get("index") or {"type": "flat"}
+            wanted = effective_index_config(self.index_config, len(picto_ids))
+            build_params = lambda c: {k: v for k, v in c.items() if k not in SEARCH_PARAMS}
+            
+            index = None
+            if os.path.exists(index_path) and build_params(saved) == build_params(wanted):
+                index = faiss.read_index(index_path)
+                if not _index_matches(index, picto_ids):
+                    logger.warning(f"{index_path} does not hold the pictograms of {meta_path}")
+                    index = None
+            if index is not None:
+                self.index = index
+                self.index_config = wanted
+                configure_search(self.index, wanted)
+            else:
+                logger.info(f"Building {wanted['type']} index from the saved vectors...")
+                self.index, self.index_config = build_index(
+                    np.ascontiguousarray(embeddings), wanted, np.array(picto_ids, dtype=np.int64),
+                )
+                self.save(path_prefix)
+            logger.info(f"{self.index_config['type']} index loaded from {index_path}")
             return True
         except Exception as e:
-            print(f"Error loading index: {e}")
+            logger.error(f"Error loading index: {e}")
+            self.index = None
             return False
 
-    def link_pictograms(self, all_pictograms: Dict[int, Pictogram]):
+    def link_pictograms(self, all_pictograms: Mapping[int, Pictogram]):
         """
-        After loading index, we need to reconstruct self.pictograms list 
-        using the loaded IDs and the full catalog.
+        Points search results at `all_pictograms`. Pictograms are looked up
+        there at search time, not copied; indexed ids it does not have are
+        left out of results (`sync` removes them from the index).
         """
-        if not hasattr(self, 'loaded_picto_ids'):
-            return
-            
-        self.pictograms = []
-        self.id_map = {}
-        
-        for i, pid in enumerate(self.loaded_picto_ids):
-            if pid in all_pictograms:
-                picto = all_pictograms[pid]
-                self.pictograms.append(picto)
-                self.id_map[pid] = i
-            else:
-                # Should not happen if catalog is consistent
-                print(f"Warning: Pictogram ID {pid} in index but not in catalog.")
-                self.pictograms.append(None) 
- 
+        self.catalog = all_pictograms
+        missing = sum(1 for pid in self.picto_ids if pid not in all_pictograms)
+        if missing:
+            logger.warning(f"{missing} indexed pictograms are not in the catalog.")
@@ -0,0 +1,112 @@
+"""
+FAISS index types for the semantic search. Kept apart from the backend so
+they can be built and benchmarked without the embedding model.
+"""
+import json
+import logging
+import os
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Embedding model and index settings. The index type and parameters come
+# from its "index" section:
+#   {"type": "flat"}                                  exact search (default)
+#   {"type": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64}
+#   {"type": "ivf_flat", "nlist": 256, "nprobe": 16}
+#   {"type": "ivf_pq", "nlist": 256, "m": 64, "nbits": 8, "nprobe": 16}
+# The settings an index was built with are saved in its .meta.json.
+DEFAULT_EMBEDDINGS_CONFIG = os.environ.get(
+    "PICTOLINK_EMBEDDINGS_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'embeddings', 'config.json'),
+)
+INDEX_DEFAULTS = {
+    "flat": {},
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+    "ivf_flat": {"nlist": 256, "nprobe": 16},
+    "ivf_pq": {"nlist": 256, "m": 64, "nbits": 8, "nprobe": 16},
+}
+# Parameters that only affect search; they can change without a rebuild
+SEARCH_PARAMS = ("ef_search", "nprobe")
+
+def load_embeddings_config(path: str = DEFAULT_EMBEDDINGS_CONFIG) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error reading {path}, using defaults: {e}")
+        return {}
+
+def load_index_config(path: str = DEFAULT_EMBEDDINGS_CONFIG) -> dict:
+    """
+    The configured index type merged with its defaults. A missing file or
+    section means the exact flat index.
+    """
+    return resolve_index_config(load_embeddings_config(path).get("index") or {})
+
+def resolve_index_config(section: dict) -> dict:
+    # Index settings with the defaults of their type filled in
+    index_type = section.get("type", "flat")
+    if index_type not in INDEX_DEFAULTS:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {list(INDEX_DEFAULTS)}")
+    return {"type": index_type, **INDEX_DEFAULTS[index_type], **section}
+
+def effective_index_config(config: dict, count: int) -> dict:
+    """
+    `config` as it applies to `count` vectors: FAISS wants ~39 training
+    points per IVF list, so nlist is capped for small catalogs.
+    """
+    config = dict(config)
+    if "nlist" in config:
+        config["nlist"] = max(1, min(int(config["nlist"]), count // 39))
+    return config
+
+def build_index(embeddings: np.ndarray, config: dict, ids: Optional[np.ndarray] = None) -> Tuple[faiss.Index, dict]:
+    """
+    Builds (and trains, for IVF types) an inner-product index over the
+    normalized `embeddings`. Returns it with the parameters actually used.
+    With `ids`, the index is wrapped in an IndexIDMap: searches return those
+    ids and vectors can be added or removed by id later.
+    """
+    n, dimension = embeddings.shape
+    config = effective_index_config(config, n)
+    index_type = config["type"]
+    
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, int(config["M"]), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = int(config["ef_construction"])
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, config["nlist"], faiss.METRIC_INNER_PRODUCT)
+        else:
+            if dimension % int(config["m"]):
+                raise ValueError(f"ivf_pq: m={config['m']} must divide the dimension {dimension}")
+            index = faiss.IndexIVFPQ(quantizer, dimension, config["nlist"], int(config["m"]), int(config["nbits"]), faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    
+    if ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+    else:
+        index.add(embeddings)
+    configure_search(index, config)
+    return index, config
+
+def configure_search(index, config: dict):
+    # ParameterSpace also reaches an index wrapped in an IndexIDMap
+    if config["type"] == "hnsw":
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", int(config["ef_search"]))
+    elif config["type"] in ("ivf_flat", "ivf_pq"):
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", int(config["nprobe"]))
+
+def supports_removal(config: dict) -> bool:
+    # HNSW graphs cannot drop vectors; they are rebuilt instead
+    return config["type"] != "hnsw"
@@ -16,6 +16,13 @@ class SemanticSearchEngine(ABC):
         Returns semantically similar pictograms with their scores.
         """
         pass
+
+    def search_batch(self, queries: List[str], limit: int = 10) -> List[List[Tuple[Pictogram, float]]]:
+        """
+        Returns one result list per query. Backends should override this
+        with a single multi-query search.
+        """
+        return [self.search(q, limit) for q in queries]
     
     @abstractmethod
     def save(self, path: str):
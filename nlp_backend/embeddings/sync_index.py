@@ -0,0 +1,37 @@
+"""
+Brings the FAISS index saved next to a catalog up to date with it, encoding
+only new or changed pictograms, and exits.
+
+    python -m nlp_backend.embeddings.sync_index --catalog nlp_backend/data/arasaac_catalog.jsonl
+
+The preload-and-fork server runs it in a child process on catalog reloads,
+so the master, which forks the workers, never runs the model.
+"""
+import argparse
+import logging
+from typing import Dict
+
+from nlp_backend.embeddings.faiss_backend import FaissBackend
+from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH, index_prefix_for, read_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def sync_index(catalog_path: str) -> Dict[str, int]:
+    store = read_catalog(catalog_path)
+    index_prefix = index_prefix_for(catalog_path)
+    engine = FaissBackend()
+    loaded = engine.load(index_prefix)
+    counts = engine.sync(store)
+    if not loaded or counts["removed"] or counts["added"]:
+        engine.save(index_prefix)
+    return counts
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Sync the saved FAISS index with the catalog.")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    args = parser.parse_args()
+    counts = sync_index(args.catalog)
+    logger.info(f"Index synced: {counts['removed']} removed, {counts['added']} added")
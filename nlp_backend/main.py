@@ -1,6 +1,22 @@
+import asyncio
+import logging
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from nlp_backend.routers import translation
+from fastapi.responses import JSONResponse, PlainTextResponse
+from nlp_backend.routers import categories, images, translation
+from nlp_backend.services.metrics import MetricsRegistry
+from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH
+from nlp_backend.services.readiness import DISABLED, FAILED, ReadinessService
+from nlp_backend.services.registry import registry
+
+# Per-token debug logging is off unless PICTOLINK_LOG_LEVEL=DEBUG
+logging.basicConfig(
+    level=os.environ.get("PICTOLINK_LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="PictoLink NLP Backend")
 
@@ -23,25 +39,157 @@ app.add_middleware(
 
 # Include routers
 app.include_router(translation.router, prefix="/api/v1")
+app.include_router(categories.router, prefix="/api/v1")
+app.include_router(images.router, prefix="/api/v1")
 
-@app.on_event("startup")
-async def startup_event():
+COMPONENTS = ("rules", "nlp", "catalog", "semantic", "nlg")
+
+def _run_component(name: str, fn, *args) -> bool:
+    """
+    Runs one startup step and records its state and load time for /ready.
+    A step returning False (fallback in use) or raising ImportError
+    (optional library missing) marks it disabled.
+    """
+    readiness = ReadinessService.get_instance()
+    readiness.start(name)
+    try:
+        result = fn(*args)
+    except ImportError as e:
+        logger.warning(f"{name} disabled: {e}")
+        readiness.finish(name, DISABLED, str(e))
+        return False
+    except Exception as e:
+        logger.error(f"Error loading {name}: {e}")
+        readiness.finish(name, FAILED, str(e))
+        return False
+    if result is False:
+        readiness.finish(name, DISABLED, "fallback in use")
+        return False
+    readiness.finish(name)
+    return True
+
+async def _load_component(name: str, fn, *args) -> bool:
+    # _run_component in a worker thread, so the event loop keeps serving
+    return await asyncio.to_thread(_run_component, name, fn, *args)
+
+def _load_nlp():
+    from nlp_backend.services.nlp import NLPService
+    if NLPService.get_instance().nlp is None:
+        raise RuntimeError("SpaCy model not available")
+
+def _load_catalog(data_path: str):
+    from nlp_backend.services.catalog import CatalogService
+    service = CatalogService.get_instance()
+    # Semantic search is switched on later by its own stage
+    service.load_data(data_path, with_semantic=False)
+    if not service.loaded:
+        raise RuntimeError(f"Catalog not found at {data_path}")
+
+async def _warmup(data_path: str):
     from nlp_backend.services.catalog import CatalogService
-    import os
+    from nlp_backend.services.nlg import NLGService
+    from nlp_backend.services.rules import RuleService
     
-    # Path to data
-    # Assuming run from root or nlp_backend dir, adjust as needed
-    # We copied data to nlp_backend/data/arasaac_catalog.jsonl
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(base_dir, "data", "arasaac_catalog.jsonl")
+    # Stage 1: lexical lookup is served as soon as these are loaded
+    await _load_component("rules", RuleService.get_instance)
+    await _load_component("nlp", _load_nlp)
+    await _load_component("catalog", _load_catalog, data_path)
     
-    service = CatalogService.get_instance()
-    service.load_data(data_path)
+    # Stage 2: models. Each switches its strategies on when it finishes;
+    # until then requests skip semantic search and use the rule-based NLG.
+    catalog = CatalogService.get_instance()
+    stages = [_load_component("nlg", NLGService.get_instance().load_model)]
+    if catalog.loaded:
+        stages.append(_load_component("semantic", catalog.load_semantic, data_path))
+    await asyncio.gather(*stages)
+    
+    # Stage 3: warm the image cache for the category grids
+    await _prefetch_images(catalog)
+
+async def _prefetch_images(catalog):
+    from nlp_backend.services.images import prefetch_images
+    try:
+        await prefetch_images(catalog)
+    except Exception as e:
+        logger.warning(f"Image prefetch failed: {e}")
+
+def preload(data_path: str = DEFAULT_CATALOG_PATH):
+    """
+    Loads every component in the calling thread, before any server starts.
+    Used by the preload-and-fork server (nlp_backend/server.py): workers
+    forked afterwards share the loaded models and indexes and skip their
+    own warmup.
+    """
+    from nlp_backend.services.catalog import CatalogService
+    from nlp_backend.services.nlg import NLGService
+    from nlp_backend.services.rules import RuleService
     
-    # Initialize NLG Service (loads model)
+    readiness = ReadinessService.get_instance()
+    for name in COMPONENTS:
+        readiness.register(name)
+    
+    _run_component("rules", RuleService.get_instance)
+    _run_component("nlp", _load_nlp)
+    _run_component("catalog", _load_catalog, data_path)
+    _run_component("nlg", NLGService.get_instance(load_model=False).load_model)
+    catalog = CatalogService.get_instance()
+    if catalog.loaded:
+        _run_component("semantic", catalog.load_semantic, data_path)
+    asyncio.run(_prefetch_and_close(catalog))
+    app.state.preloaded = True
+
+async def _prefetch_and_close(catalog):
+    # The HTTP client belongs to this event loop; workers open their own
+    from nlp_backend.services.images import ImageService
+    await _prefetch_images(catalog)
+    await ImageService.get_instance().aclose()
+
+@app.on_event("startup")
+async def startup_event():
+    if getattr(app.state, "preloaded", False):
+        logger.info("Components preloaded by the master process.")
+        return
+    
+    readiness = ReadinessService.get_instance()
+    for name in COMPONENTS:
+        readiness.register(name)
+    
+    # Created without the model so requests never block on the download
     from nlp_backend.services.nlg import NLGService
-    NLGService.get_instance()
+    NLGService.get_instance(load_model=False)
+    
+    # Load in the background so the server accepts connections right away
+    app.state.warmup = asyncio.create_task(_warmup(DEFAULT_CATALOG_PATH))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from nlp_backend.services.images import ImageService
+    images = registry.peek(ImageService)
+    if images is not None:
+        await images.aclose()
+    # Worker pools and other services with a shutdown(), newest first
+    registry.close()
 
 @app.get("/health")
 def health_check():
+    # Liveness only; see /ready for load state
     return {"status": "ok"}
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Per-component load state and time. 200 once lexical translation can be
+    served (rules, spaCy and catalog loaded), 503 before that. Semantic
+    search and NLG report their own state and switch on when loaded.
+    """
+    report = ReadinessService.get_instance().report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms, strategy hit
+    counters, worker pool and cache sizes (gauges) and their hit, miss,
+    eviction and rejection totals (counters).
+    """
+    return PlainTextResponse(MetricsRegistry.get_instance().expose(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,125 @@
+import hashlib
+import os
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from typing import List, Optional
+from nlp_backend.routers.translation import FAST_JSON, PictoItem
+from nlp_backend.services.catalog import CatalogService
+from nlp_backend.services.categories import CURATED, NATIVE
+from nlp_backend.services.store import encode_json
+
+router = APIRouter()
+
+# Category content only changes with the catalog or the mappings file; the
+# ETag lets clients revalidate after that
+CACHE_MAX_AGE = int(os.environ.get("PICTOLINK_CATEGORY_MAX_AGE", 3600))
+
+class CategorySummary(BaseModel):
+    name: str
+    source: str
+    count: int
+    # First pictogram, for the grid tile
+    cover: Optional[PictoItem] = None
+
+class CategoryListResponse(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    categories: List[CategorySummary]
+
+class CategoryResponse(BaseModel):
+    name: str
+    source: str
+    total: int
+    offset: int
+    limit: int
+    pictograms: List[PictoItem]
+
+def _loaded_catalog() -> CatalogService:
+    catalog = CatalogService.get_instance()
+    if not catalog.loaded:
+        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+    return catalog
+
+def _etag(catalog: CatalogService, *parts) -> str:
+    key = ":".join(str(p) for p in (catalog.categories.checksum,) + parts)
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Sets the cache headers on `response`. Returns a 304 response if the
+    client already holds this version.
+    """
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    response.headers.update(headers)
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=headers)
+    return None
+
+@router.get("/categories", response_model=CategoryListResponse)
+async def list_categories(
+    request: Request,
+    response: Response,
+    source: Optional[str] = Query(None, pattern=f"^({CURATED}|{NATIVE})$"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Curated categories (analysis_results/category_mappings.json) followed by
+    ARASAAC native categories, paginated.
+    """
+    catalog = _loaded_catalog()
+    etag = _etag(catalog, "list", source, offset, limit)
+    cached = _not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    index = catalog.categories
+    names = index.list(source)
+    categories = []
+    for name in names[offset:offset + limit]:
+        ids = index.get(name)
+        categories.append({
+            "name": name,
+            "source": index.sources[name],
+            "count": len(ids),
+            "cover": catalog.get_by_id(ids[0]) if ids else None,
+        })
+    return {"total": len(names), "offset": offset, "limit": limit, "categories": categories}
+
+@router.get("/categories/{name}", response_model=CategoryResponse)
+async def get_category(
+    name: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(60, ge=1, le=500),
+):
+    """
+    Pictograms of one category, paginated.
+    """
+    catalog = _loaded_catalog()
+    index = catalog.categories
+    ids = index.get(name)
+    if ids is None:
+        raise HTTPException(status_code=404, detail=f"Unknown category '{name}'")
+    etag = _etag(catalog, "category", name, offset, limit)
+    cached = _not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    pictograms = [p for p in (catalog.get_by_id(pid) for pid in ids[offset:offset + limit]) if p is not None]
+    page = {
+        "name": name,
+        "source": index.sources[name],
+        "total": len(ids),
+        "offset": offset,
+        "limit": limit,
+    }
+    if not FAST_JSON:
+        return dict(page, pictograms=pictograms)
+    # Same layout as CategoryResponse, with the pre-encoded pictograms
+    body = encode_json(page)[:-1] + b',"pictograms":[' + b','.join(p.json() for p in pictograms) + b']}'
+    return Response(body, media_type="application/json", headers={k: response.headers[k] for k in ("etag", "cache-control")})
@@ -0,0 +1,58 @@
+import hashlib
+import os
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional
+from nlp_backend.services.catalog import CatalogService
+from nlp_backend.services.images import DEFAULT_IMAGE_FORMAT, THUMBNAIL_SIZES, ImageService
+
+router = APIRouter()
+
+# Images only change when ARASAAC replaces them (new URL in the catalog,
+# new cache entry); the ETag covers the rest
+IMAGE_MAX_AGE = int(os.environ.get("PICTOLINK_IMAGE_MAX_AGE", 7 * 24 * 3600))
+
+@router.get("/pictograms/{picto_id}/image")
+async def pictogram_image(
+    picto_id: int,
+    request: Request,
+    format: str = Query(DEFAULT_IMAGE_FORMAT, description="image_urls key, e.g. png_color, svg_color or detail"),
+    size: Optional[int] = Query(None, description=f"Thumbnail width, one of {THUMBNAIL_SIZES}"),
+):
+    """
+    Pictogram image served from the local cache (fetched from ARASAAC on
+    first use), optionally as a thumbnail.
+    """
+    if size is not None and size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=422, detail=f"size must be one of {THUMBNAIL_SIZES}")
+    catalog = CatalogService.get_instance()
+    if not catalog.loaded:
+        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+    formats = catalog.image_formats()
+    if format not in formats:
+        raise HTTPException(status_code=400, detail=f"format must be one of {formats}")
+    picto = catalog.get_by_id(picto_id)
+    url = picto.image_urls.get(format) if picto else None
+    if url is None:
+        raise HTTPException(status_code=404, detail="Pictogram image not found")
+
+    images = ImageService.get_instance()
+    try:
+        data = await images.get(picto_id, url, size)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Image origin error: {e}")
+    if data is None:
+        raise HTTPException(status_code=404, detail="Pictogram image not found")
+
+    etag = '"' + hashlib.sha1(data).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={IMAGE_MAX_AGE}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(data, media_type=images.media_type(url, size), headers=headers)
+
+@router.get("/image-cache")
+async def image_cache_stats():
+    """
+    Size and hit/miss/eviction counters of the image cache.
+    """
+    return ImageService.get_instance().stats()
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-from nlp_backend.services.catalog import CatalogService
+import asyncio
+import hmac
+import json
+import logging
+import os
+import signal
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+from nlp_backend.services.catalog import FIELD_PRIORITY, CatalogService, write_catalog_delta
 from nlp_backend.services.nlp import NLPService
+from nlp_backend.embeddings.cache import EmbeddingCache
+from nlp_backend.services.cache import TranslationCache
+from nlp_backend.services.executor import ExecutorService, PoolSaturatedError
+from nlp_backend.services.metrics import STAGE_SECONDS, STRATEGY_HITS
+from nlp_backend.services.phrases import normalize_text
+from nlp_backend.services.readiness import LOADING, PENDING, ReadinessService
+from nlp_backend.services.registry import registry
+from nlp_backend.services.rules import RuleService, RuleTables
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class TextRequest(BaseModel):
     text: str
 
 class PictoItem(BaseModel):
+    # Also validated straight from catalog records when serializing responses
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     labels: dict
     image_urls: dict
@@ -23,140 +42,69 @@ class PictosRequest(BaseModel):
 class TextResponse(BaseModel):
     text: str
 
-# Load special phrases globally
-import json
-import os
+class BatchTextRequest(BaseModel):
+    texts: List[str]
 
-SPECIAL_PHRASES = {}
-try:
-    # Adjust path: routers/translation.py -> ../frases_especiales.json
-    json_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frases_especiales.json')
-    if not os.path.exists(json_path):
-        # Try alternative path if __file__ is weird
-        json_path = os.path.join(os.getcwd(), 'nlp_backend', 'frases_especiales.json')
-        
-    with open(json_path, 'r', encoding='utf-8') as f:
-        SPECIAL_PHRASES = json.load(f)
-    # print(f"DEBUG: Loaded {len(SPECIAL_PHRASES)} special phrases from {json_path}")
-except Exception as e:
-    print(f"Error loading special phrases: {e}")
+class BatchPictosResponse(BaseModel):
+    results: List[PictosResponse]
 
-@router.post("/text-to-pictos", response_model=PictosResponse)
-async def text_to_pictos(request: TextRequest):
-    catalog = CatalogService.get_instance()
-    nlp = NLPService.get_instance()
-    
-    if not catalog.loaded:
-        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+class CatalogRecord(BaseModel):
+    # Same shape as a line of arasaac_catalog.jsonl; other fields
+    # (synonyms, sources, ...) are kept as given
+    model_config = ConfigDict(extra="allow")
 
-    import unicodedata
-    import numpy as np
+    id: int
+    labels: Dict[str, str] = {}
+    image_urls: Dict[str, str] = {}
 
-    def normalize_text(text: str) -> str:
-        # Remove accents and lowercase
-        text = text.lower().strip()
-        text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
-        # Keep only alphanumeric and spaces
-        text = ''.join(c for c in text if c.isalnum() or c.isspace())
-        # Collapse multiple spaces
-        text = ' '.join(text.split())
-        return text.strip()
-    # 1. Pre-process text
-    doc = nlp.process_text(request.text)
+class CatalogDelta(BaseModel):
+    upsert: List[CatalogRecord] = []
+    remove: List[int] = []
+
+MAX_BATCH_TEXTS = 1000
+
+def _better_term(catalog: CatalogService, term: str, current: Optional[str]) -> bool:
+    # True if term matches a better field tier than the current match
+    priority = catalog.term_priority(term)
+    return priority is not None and (current is None or priority < catalog.term_priority(current))
+
+def _match_tokens(doc: List[dict], catalog: CatalogService, rules: RuleTables, boundaries: Optional[list] = None) -> list:
+    """
+    Runs the lexical strategies over a processed sentence.
+    Returns a list with resolved Pictograms and, for single tokens, pending
+    dicts that _finalize_matches completes once semantic results are known.
+    If `boundaries` is given, (token index, output length) is appended at
+    the start of every matched span and once at the end.
+    """
     token_texts = [t['text'] for t in doc]
     token_lemmas = [t['lemma'] for t in doc]
     
-    # print(f"DEBUG: Tokens: {token_texts}")
+    logger.debug("Tokens: %s", token_texts)
     
     final_pictos = []
     i = 0
     n = len(token_texts)
     
-    # Stopwords to ignore (unless part of a phrase)
-    STOPWORDS = {
-        'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas',
-        'al', 'del', 'de', 'a', 'en', 'con', 'por', 'para', 'y', 'o'
-    }
-
-    # Priority mappings (Semantic overrides & Conjugations)
-    PRIORITY_MAP = {
-        'viajar': 'viaje', 'comprar': 'compra', 'masturbar': 'masturbación',
-        'que': 'qué', 
-        'encanta': 'gustar', 'encantan': 'gustar', 'gusta': 'gustar', 'gustan': 'gustar',
-        'come': 'comer', 'comes': 'comer', 'comen': 'comer', 'comemos': 'comer',
-        'bebe': 'beber', 'bebes': 'beber', 'beben': 'beber',
-        'duerme': 'dormir', 'duermen': 'dormir', 'juega': 'jugar', 'juegan': 'jugar',
-        'quiero': 'querer', 'quieres': 'querer', 'quiere': 'querer', 'queremos': 'querer', 'quieren': 'querer',
-        'tengo': 'tener', 'tienes': 'tener', 'tiene': 'tener', 'tenemos': 'tener', 'tienen': 'tener',
-        'voy': 'ir', 'vas': 'ir', 'va': 'ir', 'vamos': 'ir', 'van': 'ir',
-        'soy': 'ser', 'eres': 'ser', 'es': 'ser', 'somos': 'ser', 'son': 'ser',
-        'estoy': 'estar', 'estás': 'estar', 'está': 'estar', 'estamos': 'estar', 'están': 'estar',
-        'lavo': 'lavar', 'lavas': 'lavar', 'lava': 'lavar', 'lavamos': 'lavar', 'lavan': 'lavar',
-        'cepillo': 'cepillar', 'cepillas': 'cepillar', 'cepilla': 'cepillar',
-        'ducho': 'duchar', 'duchas': 'duchar', 'ducha': 'duchar',
-        'baño': 'bañar', 'bañas': 'bañar', 'baña': 'bañar',
-        'visto': 'vestir', 'vistes': 'vestir', 'viste': 'vestir',
-        'pongo': 'poner', 'pones': 'poner', 'pone': 'poner',
-        'quito': 'quitar', 'quitas': 'quitar', 'quita': 'quitar',
-    }
-    
-    FALLBACK_MAP = {
-        'mi': 'mío', 'mis': 'mis', 'tu': 'tú', 'tus': 'tú', 'su': 'su', 'sus': 'su',
-        'nuestro': 'nuestro', 'nuestra': 'nuestro',
-        'yo': 'yo', 'me': 'yo', 'mí': 'yo', 'tú': 'tú', 'te': 'tú', 'ti': 'tú',
-        'él': 'él', 'lo': 'él', 'ella': 'ella', 'nosotros': 'nosotros', 'nos': 'nosotros',
-        'vosotros': 'vosotros', 'os': 'vosotros', 'ellos': 'ellos',
-        'encantar': 'gustar',
-        'quién': 'quién', 'quien': 'quién', 'cómo': 'cómo', 'como': 'cómo',
-        'cuándo': 'cuándo', 'cuando': 'cuándo', 'dónde': 'dónde', 'donde': 'dónde',
-        'cuánto': 'mucho', 'cuanto': 'mucho',
-        'por qué': 'por qué', 'porque': 'por qué',
-        'sí': 'sí', 'si': 'sí', 'no': 'no', 'pero': 'pero',
-        'muy': 'mucho', 'más': 'más',
-    }
-
-    # Context embedding for re-ranking
-    context_embedding = None
-    if catalog.semantic_engine:
-        try:
-            context_embedding = catalog.semantic_engine.get_embedding(request.text)
-        except Exception:
-            pass
-
     while i < n:
+        if boundaries is not None:
+            boundaries.append((i, len(final_pictos)))
         match_found = False
         
         # Strategy 0: Special Phrases (Highest Priority)
-        # Check for phrases starting at current position, longest first
-        max_special_gram = min(6, n - i) # Check up to 6 words for special phrases
+        # Longest phrase starting at current position (up to 6 words)
+        with STAGE_SECONDS.time("special_phrase"):
+            special = catalog.phrase_matcher.match(token_texts, i)
         
-        for k in range(max_special_gram, 0, -1):
-            phrase_tokens = token_texts[i : i+k]
-            phrase_text = " ".join(phrase_tokens)
-            normalized_phrase = normalize_text(phrase_text)
-            
-            matched_ids = None
-            
-            # Direct match (case-insensitive)
-            if phrase_text.lower() in SPECIAL_PHRASES:
-                matched_ids = SPECIAL_PHRASES[phrase_text.lower()]
-            
-            # Normalized match
-            if not matched_ids:
-                for key, ids in SPECIAL_PHRASES.items():
-                    if normalize_text(key) == normalized_phrase:
-                        matched_ids = ids
-                        break
-            
-            if matched_ids:
-                # print(f"Special phrase match: '{phrase_text}' -> IDs {matched_ids}")
-                for pid in matched_ids:
-                    picto = catalog.get_by_id(int(pid))
-                    if picto:
-                        final_pictos.append(picto)
-                i += k
-                match_found = True
-                break
+        if special:
+            k, matched_ids = special
+            logger.debug("Special phrase match: '%s' -> IDs %s", ' '.join(token_texts[i:i+k]), matched_ids)
+            STRATEGY_HITS.inc("special_phrase")
+            for pid in matched_ids:
+                picto = catalog.get_by_id(int(pid))
+                if picto:
+                    final_pictos.append(picto)
+            i += k
+            match_found = True
         
         if match_found:
             continue
@@ -164,25 +112,27 @@ async def text_to_pictos(request: TextRequest):
         # Strategy 1: Longest Matching N-gram (Phrase Matching)
         max_gram = min(5, n - i)
         
-        for k in range(max_gram, 1, -1):
-            phrase_tokens = token_texts[i : i+k]
-            phrase_text = " ".join(phrase_tokens)
-            normalized_phrase = normalize_text(phrase_text)
-            
-            matches = catalog.find_by_term(normalized_phrase)
-            
-            if not matches and k > 1:
-                phrase_lemmas = token_lemmas[i : i+k]
-                lemma_phrase = " ".join(phrase_lemmas)
-                normalized_lemma_phrase = normalize_text(lemma_phrase)
-                matches = catalog.find_by_term(normalized_lemma_phrase)
-            
-            if matches:
-                print(f"Phrase match found: '{phrase_text}' -> '{matches[0].labels.get('es')}'")
-                final_pictos.append(matches[0])
-                i += k
-                match_found = True
-                break
+        with STAGE_SECONDS.time("ngram"):
+            for k in range(max_gram, 1, -1):
+                phrase_tokens = token_texts[i : i+k]
+                phrase_text = " ".join(phrase_tokens)
+                normalized_phrase = normalize_text(phrase_text)
+                
+                matches = catalog.find_by_term(normalized_phrase)
+                
+                if not matches and k > 1:
+                    phrase_lemmas = token_lemmas[i : i+k]
+                    lemma_phrase = " ".join(phrase_lemmas)
+                    normalized_lemma_phrase = normalize_text(lemma_phrase)
+                    matches = catalog.find_by_term(normalized_lemma_phrase)
+                
+                if matches:
+                    logger.debug("Phrase match found: '%s' -> '%s'", phrase_text, matches[0].labels.get('es'))
+                    STRATEGY_HITS.inc("ngram")
+                    final_pictos.append(matches[0])
+                    i += k
+                    match_found = True
+                    break
         
         if match_found:
             continue
@@ -192,42 +142,61 @@ async def text_to_pictos(request: TextRequest):
         text_lower = current_token['text'].lower()
         lemma_lower = current_token['lemma'].lower()
         matches = []
+        # Catalog term the lexical matches were found under
+        term = None
         
         # Check Stopwords (Skip if found)
-        if text_lower in STOPWORDS:
-            print(f"Skipping stopword: '{text_lower}'")
+        if text_lower in rules.stopwords:
+            logger.debug("Skipping stopword: '%s'", text_lower)
+            STRATEGY_HITS.inc("stopword")
             i += 1
             continue
         
         # Strategy 2: Priority Map
-        if text_lower in PRIORITY_MAP:
-            mapped_term = PRIORITY_MAP[text_lower]
-            matches = catalog.find_by_term(mapped_term)
+        if text_lower in rules.priority_map:
+            with STAGE_SECONDS.time("priority_map"):
+                mapped_term = rules.priority_map[text_lower]
+                matches = catalog.find_by_term(mapped_term)
             if matches:
-                print(f"Priority mapping: '{text_lower}' -> '{mapped_term}'")
+                term = mapped_term
+                logger.debug("Priority mapping: '%s' -> '%s'", text_lower, mapped_term)
+                STRATEGY_HITS.inc("priority_map")
         
         # Strategy 3: Lemma Search
-        if not matches:
-            matches = catalog.find_by_term(lemma_lower)
-            
         # Strategy 4: Original Text Search
+        # The better field tier wins (the lemma on a tie): a lemma that is
+        # only a keyword must not hide a Spanish label of the surface form.
+        # A keyword or other-language hit is weak: the rule-based strategies
+        # below still run and replace it if they reach a label or synonym.
+        weak = False
         if not matches:
-            matches = catalog.find_by_term(text_lower)
+            with STAGE_SECONDS.time("lemma"):
+                term = None
+                for candidate in (lemma_lower, text_lower):
+                    if _better_term(catalog, candidate, term):
+                        term = candidate
+                if term is not None:
+                    matches = catalog.find_by_term(term)
+            if matches:
+                STRATEGY_HITS.inc("lemma")
+                weak = catalog.term_priority(term) > FIELD_PRIORITY['synonym']
             
         # Strategy 5: Reflexive Verbs
-        if not matches:
-            reflexive_pronouns = {'me': 'yo', 'te': 'tú', 'se': 'él', 'nos': 'nosotros', 'os': 'vosotros'}
-            for suffix, pronoun in reflexive_pronouns.items():
-                if text_lower.endswith(suffix) and len(text_lower) > len(suffix) + 3:
+        if not matches or weak:
+            with STAGE_SECONDS.time("reflexive"):
+                for suffix, pronoun in rules.match_reflexive(text_lower):
                     stem = text_lower[:-len(suffix)]
-                    stem_term = PRIORITY_MAP.get(stem, stem)
-                    stem_matches = catalog.find_by_term(stem_term)
+                    stem_term = rules.priority_map.get(stem, stem)
+                    stem_matches = []
+                    if _better_term(catalog, stem_term, term if matches else None):
+                        stem_matches = catalog.find_by_term(stem_term)
                     
-                    if not stem_matches:
+                    if not stem_matches and not matches:
                          stem_matches = catalog.find_fuzzy(stem_term, threshold=85)
                          
                     if stem_matches:
-                        print(f"Reflexive match: '{text_lower}' -> '{stem}'")
+                        logger.debug("Reflexive match: '%s' -> '%s'", text_lower, stem)
+                        STRATEGY_HITS.inc("reflexive")
                         final_pictos.append(stem_matches[0])
                         # Add pronoun
                         pronoun_matches = catalog.find_by_term(pronoun)
@@ -240,76 +209,425 @@ async def text_to_pictos(request: TextRequest):
                 continue
 
         # Strategy 6: Diminutives
-        if not matches:
-             diminutive_rules = [
-                ('citos', ''), ('citas', ''), ('cito', ''), ('cita', ''),
-                ('itos', 'os'), ('itas', 'as'), ('ito', 'o'), ('ita', 'a'),
-                ('illos', 'os'), ('illas', 'as'), ('illo', 'o'), ('illa', 'a'),
-                ('icos', 'os'), ('icas', 'as'), ('ico', 'o'), ('ica', 'a')
-            ]
-             for suffix, replacement in diminutive_rules:
-                if text_lower.endswith(suffix) and len(text_lower) > len(suffix) + 2:
+        if not matches or weak:
+            current = term if matches else None
+            with STAGE_SECONDS.time("diminutive"):
+                for suffix, replacement in rules.match_diminutive(text_lower):
                     stem = text_lower[:-len(suffix)] + replacement
-                    matches = catalog.find_by_term(stem)
-                    if matches:
-                        print(f"Diminutive match: '{text_lower}' -> '{stem}'")
+                    if _better_term(catalog, stem, current):
+                        term = stem
+                        logger.debug("Diminutive match: '%s' -> '%s'", text_lower, stem)
                         break
                     
                     # Try just stripping suffix (sometimes works for words ending in consonant + ito)
                     if replacement != '':
                         stem_stripped = text_lower[:-len(suffix)]
-                        matches = catalog.find_by_term(stem_stripped)
-                        if matches:
-                            print(f"Diminutive match (stripped): '{text_lower}' -> '{stem_stripped}'")
+                        if _better_term(catalog, stem_stripped, current):
+                            term = stem_stripped
+                            logger.debug("Diminutive match (stripped): '%s' -> '%s'", text_lower, stem_stripped)
                             break
+            if term != current:
+                matches = catalog.find_by_term(term)
+                weak = catalog.term_priority(term) > FIELD_PRIORITY['synonym']
+                STRATEGY_HITS.inc("diminutive")
         
         # Strategy 7: Fallback Map
-        if not matches and text_lower in FALLBACK_MAP:
-             mapped_term = FALLBACK_MAP[text_lower]
-             matches = catalog.find_by_term(mapped_term)
-             if matches:
-                 print(f"Fallback mapping: '{text_lower}' -> '{mapped_term}'")
+        if (not matches or weak) and text_lower in rules.fallback_map:
+            with STAGE_SECONDS.time("fallback"):
+                mapped_term = rules.fallback_map[text_lower]
+                if _better_term(catalog, mapped_term, term if matches else None):
+                    matches = catalog.find_by_term(mapped_term)
+                    term = mapped_term
+                    logger.debug("Fallback mapping: '%s' -> '%s'", text_lower, mapped_term)
+                    STRATEGY_HITS.inc("fallback")
+
+        # Strategy 8 (Semantic Search) and later run in _finalize_matches,
+        # so semantic lookups can be batched across tokens and texts
+        final_pictos.append({
+            'text': text_lower,
+            'term': term if matches else None,
+            'matches': matches,
+            'semantic': (not matches and len(text_lower) > 2 and not current_token['is_stop'])
+        })
+            
+        i += 1
 
-        # Strategy 8: Semantic Search
-        if not matches and catalog.semantic_engine:
-             if len(text_lower) > 2 and not current_token['is_stop']:
-                 print(f"Trying semantic search for '{text_lower}'...")
-                 semantic_matches = catalog.search_semantic(text_lower, limit=5)
-                 if semantic_matches:
-                     matches = [m[0] for m in semantic_matches if m[1] > 0.4]
+    if boundaries is not None:
+        boundaries.append((n, len(final_pictos)))
+    return final_pictos
+
+def _finalize_matches(slots: list, semantic_results, catalog: CatalogService) -> list:
+    """
+    Completes pending tokens from _match_tokens: applies semantic results
+    (consumed in order from semantic_results) and fuzzy search.
+    Tokens with several candidates stay as lists for _rerank_matches, unless
+    they matched a catalog term whose canonical pictogram is a clear winner.
+    """
+    final_pictos = []
+    for slot in slots:
+        if not isinstance(slot, dict):
+            final_pictos.append(slot)
+            continue
+            
+        text_lower = slot['text']
+        matches = slot['matches']
+
+        # Strategy 8: Semantic Search (results computed by the caller).
+        # There is one result list per semantic slot, empty if the engine
+        # was not attached yet when the search ran.
+        if slot['semantic']:
+             semantic_matches = next(semantic_results, [])
+             if semantic_matches:
+                 matches = [m[0] for m in semantic_matches if m[1] > 0.4]
+             if matches:
+                 STRATEGY_HITS.inc("semantic")
 
         # Strategy 9: Fuzzy Search (Restricted)
         if not matches:
             if len(text_lower) > 4:
-                matches = catalog.find_fuzzy(text_lower)
-
-        # Re-ranking
-        if matches and len(matches) > 1 and context_embedding is not None:
-             try:
-                scores = []
-                for m in matches:
-                    label = m.labels.get('es', '')
-                    if label:
-                        label_emb = catalog.semantic_engine.get_vector_by_id(m.id)
-                        if label_emb is None:
-                            label_emb = catalog.semantic_engine.get_embedding(label)
-                        score = np.dot(context_embedding, label_emb)
-                        scores.append((score, m))
-                if scores:
-                    scores.sort(key=lambda x: x[0], reverse=True)
-                    matches = [scores[0][1]]
-             except Exception:
-                 pass
-
-        if matches:
+                with STAGE_SECONDS.time("fuzzy"):
+                    matches = catalog.find_fuzzy(text_lower)
+                if matches:
+                    STRATEGY_HITS.inc("fuzzy")
+
+        if matches and len(matches) > 1 and catalog.semantic_engine:
+            if slot['term'] and not catalog.is_close_call(slot['term']):
+                # Precomputed canonical order, no vector math needed
+                STRATEGY_HITS.inc("canonical")
+                final_pictos.append(matches[0])
+            else:
+                final_pictos.append(matches)
+        elif matches:
             final_pictos.append(matches[0])
         else:
-            print(f"Token '{text_lower}' found NO MATCH")
+            logger.debug("Token '%s' found NO MATCH", text_lower)
+            STRATEGY_HITS.inc("no_match")
+
+    return final_pictos
+
+def _needs_context(resolved: list) -> bool:
+    return any(isinstance(r, list) for r in resolved)
+
+def _rerank_matches(resolved: list, catalog: CatalogService, context_embedding=None) -> list:
+    """
+    Picks one pictogram per ambiguous token: candidates are scored against
+    the sentence embedding with a single matrix-vector product.
+    """
+    import numpy as np
+
+    final_pictos = []
+    for item in resolved:
+        if not isinstance(item, list):
+            final_pictos.append(item)
+            continue
             
-        i += 1
+        best = item[0]
+        candidates = [m for m in item if m.labels.get('es', '')]
+        if candidates and context_embedding is not None:
+            try:
+                with STAGE_SECONDS.time("rerank"):
+                    vectors = catalog.semantic_engine.get_vectors(
+                        [m.id for m in candidates], [m.labels['es'] for m in candidates]
+                    )
+                    best = candidates[int(np.argmax(vectors @ context_embedding))]
+                STRATEGY_HITS.inc("rerank")
+            except Exception:
+                pass
+        final_pictos.append(best)
+
+    return final_pictos
+
+def _semantic_queries(slots: list) -> List[str]:
+    return [s['text'] for s in slots if isinstance(s, dict) and s['semantic']]
+
+def _context_embeddings(catalog: CatalogService, texts: List[str]) -> list:
+    # Context embeddings for re-ranking (None when unavailable)
+    if catalog.semantic_engine and texts:
+        try:
+            with STAGE_SECONDS.time("context_embedding"):
+                return list(catalog.semantic_engine.get_embeddings(texts))
+        except Exception:
+            pass
+    return [None] * len(texts)
+
+def _semantic_search(catalog: CatalogService, queries: List[str]) -> list:
+    # Strategy 8 for all pending tokens at once, one result list per query
+    if not queries or not catalog.semantic_engine:
+        return [[] for _ in queries]
+    with STAGE_SECONDS.time("semantic"):
+        return catalog.search_semantic_batch(queries, limit=5)
+
+def _translation_version(catalog: CatalogService, rules: RuleTables):
+    # Cached translations are only valid for this catalog + phrase set + rules
+    return (catalog.version, catalog.phrase_matcher.checksum, rules.checksum)
+
+def _pictos_from_ids(catalog: CatalogService, ids: List[int]) -> list:
+    return [p for p in (catalog.get_by_id(pid) for pid in ids) if p is not None]
+
+# Pictogram lists are written from the JSON each record got at catalog
+# load instead of validating and encoding them per response.
+# PICTOLINK_FAST_JSON=0 goes through the response models instead.
+FAST_JSON = os.environ.get("PICTOLINK_FAST_JSON", "1") != "0"
 
+def pictos_json(pictos: list) -> bytes:
+    # {"pictograms": [...]} as PictosResponse encodes it
+    return b'{"pictograms":[' + b','.join(p.json() for p in pictos) + b']}'
+
+def _pictos_response(pictos: list):
+    if not FAST_JSON:
+        return {"pictograms": pictos}
+    return Response(pictos_json(pictos), media_type="application/json")
+
+def _batch_response(results: List[list]):
+    if not FAST_JSON:
+        return {"results": [{"pictograms": pictos} for pictos in results]}
+    body = b'{"results":[' + b','.join(pictos_json(pictos) for pictos in results) + b']}'
+    return Response(body, media_type="application/json")
+
+async def _run_stage(pool: str, fn, *args):
+    """
+    Runs a CPU-bound stage in its worker pool so the event loop stays free.
+    """
+    try:
+        return await ExecutorService.get_instance().run(pool, fn, *args)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/text-to-pictos", response_model=PictosResponse)
+async def text_to_pictos_endpoint(request: TextRequest):
+    return _pictos_response((await text_to_pictos(request))["pictograms"])
+
+async def text_to_pictos(request: TextRequest) -> dict:
+    """
+    The /text-to-pictos pipeline: {"pictograms": [records]}. The route
+    encodes it; scripts call this directly.
+    """
+    catalog = CatalogService.get_instance()
+    
+    if not catalog.loaded:
+        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+    nlp = NLPService.get_instance()
+
+    cache = TranslationCache.get_instance()
+    cache_key = TranslationCache.make_key(request.text)
+    # One snapshot per request, so a concurrent reload cannot mix tables
+    rules = RuleService.get_instance().tables
+    version = _translation_version(catalog, rules)
+    cached_ids = cache.get(cache_key, version)
+    if cached_ids is not None:
+        return {"pictograms": _pictos_from_ids(catalog, cached_ids)}
+
+    # 1. Pre-process text
+    doc = await _run_stage("nlp", nlp.process_text, request.text)
+    
+    slots = await _run_stage("nlp", _match_tokens, doc, catalog, rules)
+    semantic_results = await _run_stage("semantic", _semantic_search, catalog, _semantic_queries(slots))
+    resolved = await _run_stage("semantic", _finalize_matches, slots, iter(semantic_results), catalog)
+
+    # Context embedding only when some token is ambiguous
+    context_embedding = None
+    if _needs_context(resolved):
+        context_embedding = (await _run_stage("semantic", _context_embeddings, catalog, [request.text]))[0]
+    final_pictos = await _run_stage("semantic", _rerank_matches, resolved, catalog, context_embedding)
+
+    cache.put(cache_key, [p.id for p in final_pictos], version)
     return {"pictograms": final_pictos}
 
+@router.post("/text-to-pictos/batch", response_model=BatchPictosResponse)
+async def text_to_pictos_batch(request: BatchTextRequest):
+    """
+    Same pipeline as /text-to-pictos for many texts at once: spaCy runs with
+    nlp.pipe and all semantic lookups share one encode + one index search.
+    """
+    catalog = CatalogService.get_instance()
+    
+    if not catalog.loaded:
+        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+    nlp = NLPService.get_instance()
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
+
+    cache = TranslationCache.get_instance()
+    # One snapshot per request, so a concurrent reload cannot mix tables
+    rules = RuleService.get_instance().tables
+    version = _translation_version(catalog, rules)
+    results: List[Optional[list]] = [None] * len(request.texts)
+    pending = []
+    for pos, text in enumerate(request.texts):
+        cached_ids = cache.get(TranslationCache.make_key(text), version)
+        if cached_ids is not None:
+            results[pos] = _pictos_from_ids(catalog, cached_ids)
+        else:
+            pending.append(pos)
+
+    if not pending:
+        return _batch_response(results)
+    texts = [request.texts[pos] for pos in pending]
+
+    docs = await _run_stage("nlp", nlp.process_texts, texts)
+
+    all_slots = await _run_stage("nlp", lambda: [_match_tokens(doc, catalog, rules) for doc in docs])
+    queries = [q for slots in all_slots for q in _semantic_queries(slots)]
+    semantic_results = iter(await _run_stage("semantic", _semantic_search, catalog, queries))
+
+    def finalize_all():
+        all_resolved = [_finalize_matches(slots, semantic_results, catalog) for slots in all_slots]
+        # One encode for the contexts of the texts that need re-ranking
+        ambiguous = [k for k, resolved in enumerate(all_resolved) if _needs_context(resolved)]
+        contexts = dict(zip(ambiguous, _context_embeddings(catalog, [texts[k] for k in ambiguous])))
+        return [
+            _rerank_matches(resolved, catalog, contexts.get(k))
+            for k, resolved in enumerate(all_resolved)
+        ]
+
+    for pos, text, final_pictos in zip(pending, texts, await _run_stage("semantic", finalize_all)):
+        cache.put(TranslationCache.make_key(text), [p.id for p in final_pictos], version)
+        results[pos] = final_pictos
+
+    return _batch_response(results)
+
+# A span's result can change when any of the next tokens change
+# (special phrases look ahead up to 6 tokens)
+STREAM_LOOKAHEAD = 6
+
+class TranslationSession:
+    """
+    Incremental text-to-pictos state for one streaming client.
+
+    Keeps the tokens and the matched spans of the previous text. On an edit,
+    spans whose lookahead window lies entirely before the first changed
+    character are kept; only the tail after them is re-parsed and re-matched.
+    """
+
+    def __init__(self, catalog: CatalogService, nlp: NLPService):
+        self.catalog = catalog
+        self.nlp = nlp
+        self.text = ""
+        self.version = None
+        self.revision = 0
+        self.tokens: List[dict] = []
+        # (first token, end token, pictograms) per matched span
+        self.spans: List[tuple] = []
+
+    def apply(self, message: dict) -> str:
+        """
+        New full text from a client message: {"text": ...} replaces the
+        text, {"delta": {"start", "end", "text"}} splices it.
+        """
+        if "text" in message:
+            return str(message["text"])
+        delta = message.get("delta")
+        if isinstance(delta, dict):
+            start = int(delta.get("start", len(self.text)))
+            end = int(delta.get("end", start))
+            if not 0 <= start <= end <= len(self.text):
+                raise ValueError("Delta out of range")
+            return self.text[:start] + str(delta.get("text", "")) + self.text[end:]
+        raise ValueError("Expected 'text' or 'delta'")
+
+    def _stable_spans(self, text: str) -> int:
+        # Number of leading spans that cannot be affected by the edit
+        changed = 0
+        limit = min(len(self.text), len(text))
+        while changed < limit and self.text[changed] == text[changed]:
+            changed += 1
+
+        kept = 0
+        for start, end, _ in self.spans:
+            window = start + STREAM_LOOKAHEAD
+            if window > len(self.tokens):
+                break
+            last = self.tokens[window - 1]
+            # Strictly before the change, so a token being typed is not kept
+            if last['idx'] + len(last['text']) >= changed:
+                break
+            kept += 1
+        return kept
+
+    def update(self, text: str, rules: RuleTables, catalog: Optional[CatalogService] = None) -> dict:
+        # A reloaded catalog has a new version, which drops the kept spans
+        if catalog is not None:
+            self.catalog = catalog
+        version = _translation_version(self.catalog, rules)
+        kept = self._stable_spans(text) if version == self.version else 0
+
+        # Re-parse from the end of the last kept token (unchanged text)
+        first_token = self.spans[kept - 1][1] if kept else 0
+        offset = 0
+        if first_token:
+            last = self.tokens[first_token - 1]
+            offset = last['idx'] + len(last['text'])
+        while offset < len(text) and text[offset].isspace():
+            offset += 1
+
+        tail = self.nlp.process_text(text[offset:], offset)
+        boundaries = []
+        slots = _match_tokens(tail, self.catalog, rules, boundaries)
+        semantic_results = iter(_semantic_search(self.catalog, _semantic_queries(slots)))
+
+        resolved = []
+        for (start, first_slot), (end, last_slot) in zip(boundaries, boundaries[1:]):
+            resolved.append((start, end, _finalize_matches(slots[first_slot:last_slot], semantic_results, self.catalog)))
+
+        context_embedding = None
+        if any(_needs_context(r) for _, _, r in resolved):
+            context_embedding = _context_embeddings(self.catalog, [text])[0]
+
+        new_spans = [
+            (first_token + start, first_token + end, _rerank_matches(r, self.catalog, context_embedding))
+            for start, end, r in resolved
+        ]
+
+        kept_pictos = sum(len(pictos) for _, _, pictos in self.spans[:kept])
+        self.tokens = self.tokens[:first_token] + tail
+        self.spans = self.spans[:kept] + new_spans
+        self.text = text
+        self.version = version
+        self.revision += 1
+
+        return {
+            "revision": self.revision,
+            # Client keeps its first `keep` pictograms and appends these
+            "keep": kept_pictos,
+            "pictograms": [p.as_dict() for _, _, pictos in new_spans for p in pictos],
+        }
+
+@router.websocket("/text-to-pictos/stream")
+async def text_to_pictos_stream(websocket: WebSocket):
+    """
+    Streaming translation: the client sends the text (or deltas) as the
+    user types and receives the changed tail of the pictogram list.
+    """
+    await websocket.accept()
+    catalog = CatalogService.get_instance()
+    if not catalog.loaded:
+        await websocket.close(code=1013, reason="Catalog not loaded yet")
+        return
+
+    session = TranslationSession(catalog, NLPService.get_instance())
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if not isinstance(message, dict):
+                    raise ValueError("Expected a JSON object")
+                text = session.apply(message)
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+                
+            rules = RuleService.get_instance().tables
+            try:
+                update = await ExecutorService.get_instance().run(
+                    "nlp", session.update, text, rules, CatalogService.get_instance()
+                )
+            except PoolSaturatedError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            await websocket.send_json(update)
+    except WebSocketDisconnect:
+        pass
+
 @router.post("/pictos-to-text", response_model=TextResponse)
 async def pictos_to_text(request: PictosRequest):
     from nlp_backend.services.nlg import NLGService
@@ -332,7 +650,8 @@ async def pictos_to_text(request: PictosRequest):
         
     # 2. Fallback to local NLG (Rule-based / Model)
     nlg = NLGService.get_instance()
-    text = nlg.generate_sentence(lemmas)
+    with STAGE_SECONDS.time("nlg"):
+        text = await _run_stage("nlg", nlg.generate_sentence, lemmas)
     
     return {"text": text}
 
@@ -342,9 +661,9 @@ async def search_pictograms(q: str):
     if not catalog.loaded:
         raise HTTPException(status_code=503, detail="Catalog not loaded yet")
         
-    matches = catalog.find_by_term(q)
+    matches = catalog.find_by_term(q, all_fields=True)
     # Limit results to 20
-    return {"pictograms": matches[:20]}
+    return _pictos_response(matches[:20])
 
 @router.get("/autocomplete", response_model=List[str])
 async def autocomplete(q: str):
@@ -353,3 +672,111 @@ async def autocomplete(q: str):
         return []
         
     return catalog.search_autocomplete(q)
+
+
+@router.get("/executors")
+async def executor_stats():
+    """
+    Per-pool worker usage and queue depth, for sizing the pools.
+    """
+    return ExecutorService.get_instance().stats()
+
+@router.get("/translation-cache")
+async def translation_cache_stats():
+    """
+    Hit/miss/eviction counters of the /text-to-pictos result cache.
+    """
+    return TranslationCache.get_instance().stats()
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    """
+    Hit/miss counters of the query embedding cache.
+    """
+    return EmbeddingCache.get_instance().stats()
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Guards the rules and catalog reload endpoints. They are off unless PICTOLINK_ADMIN_TOKEN
+    is set; callers then send the token in the X-Admin-Token header.
+    """
+    token = os.environ.get("PICTOLINK_ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/rules/reload", dependencies=[Depends(require_admin)])
+async def reload_rules():
+    """
+    Recompiles reglas_traduccion.json and swaps it in without a restart.
+    """
+    try:
+        tables = RuleService.get_instance().reload()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rule file: {e}")
+    # Validated here; the other workers get it from the master
+    _reload_workers(signal.SIGHUP)
+    return {"version": tables.version, "checksum": tables.checksum}
+
+def _reload_workers(sig: int) -> bool:
+    """
+    Under the preload-and-fork server, asks the master to reload the rules
+    (SIGHUP) or the catalog (SIGUSR1) and replace every worker. False when
+    running standalone.
+    """
+    if registry.master_pid is None:
+        return False
+    os.kill(registry.master_pid, sig)
+    return True
+
+async def _reload_catalog(delta: Optional[CatalogDelta] = None) -> dict:
+    catalog = CatalogService.get_instance()
+    if not catalog.loaded:
+        raise HTTPException(status_code=503, detail="Catalog not loaded yet")
+    # The startup stage attaches the semantic engine to the current instance
+    if ReadinessService.get_instance().state("semantic") in (PENDING, LOADING):
+        raise HTTPException(status_code=409, detail="Semantic index is still loading")
+
+    forked = registry.master_pid is not None
+
+    def apply():
+        # Serializes concurrent deltas on the file as well as the rebuild
+        with CatalogService._reload_lock:
+            written = {}
+            if delta is not None:
+                written = write_catalog_delta(
+                    catalog.file_path,
+                    [record.model_dump() for record in delta.upsert],
+                    delta.remove,
+                )
+            if forked:
+                # The master rebuilds once and forks fresh workers
+                return written
+            return {kind: len(ids) for kind, ids in CatalogService.reload().items()}
+
+    # Rebuilt off the event loop; requests keep using the old catalog until the swap
+    try:
+        changes = await asyncio.to_thread(apply)
+    except (OSError, RuntimeError) as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {e}")
+    if forked:
+        _reload_workers(signal.SIGUSR1)
+        return JSONResponse({"status": "reloading", **changes}, status_code=202)
+    return {"version": CatalogService.get_instance().version, **changes}
+
+@router.post("/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_catalog():
+    """
+    Reloads the catalog files (after ARASAAC updates) without a restart.
+    Only added or relabelled pictograms are re-embedded.
+    """
+    return await _reload_catalog()
+
+@router.post("/catalog/delta", dependencies=[Depends(require_admin)])
+async def update_catalog(delta: CatalogDelta):
+    """
+    Applies added/changed records and removed ids to arasaac_catalog.jsonl
+    and reloads it as /catalog/reload does.
+    """
+    return await _reload_catalog(delta)
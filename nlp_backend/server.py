@@ -0,0 +1,206 @@
+"""
+Preload-and-fork server.
+
+    python -m nlp_backend.server --workers 4 --port 8000
+
+The master process loads spaCy, the catalog, the FAISS index and the NLG
+model once (main.preload), then forks the workers, which serve the app on
+a shared listening socket. Model weights, indexes and the mapped catalog
+snapshot are only read after loading, so their pages stay shared
+copy-on-write and each extra worker costs little more than its own
+interpreter state, thread pools and caches.
+
+Signals to the master:
+    SIGTERM / SIGINT  stop the workers gracefully and exit
+    SIGHUP            reload the rules in the master, then replace the
+                      workers one by one (POST /rules/reload sends it when
+                      running under this server)
+    SIGUSR1           reload the catalog the same way (POST /catalog/reload
+                      and /catalog/delta send it)
+
+The master never encodes: encoding starts torch's thread pool, which forked
+workers must not inherit. A catalog reload syncs the saved FAISS index in a
+child process (embeddings.sync_index) and the master then only loads it.
+Build the FAISS index before the first start in this mode. Requires os.fork
+(Linux/macOS).
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Set
+
+import uvicorn
+
+from nlp_backend.main import app, preload
+from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH, CatalogService
+from nlp_backend.services.registry import registry
+from nlp_backend.services.rules import RuleService
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after its start is respawned with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+class PreforkServer:
+    def __init__(self, host: str, port: int, workers: int, data_path: str = DEFAULT_CATALOG_PATH):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.data_path = data_path
+        self.sock = None
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.retiring: Set[int] = set()
+        self.stopping = False
+        self.reload_rules_requested = False
+        self.reload_catalog_requested = False
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def spawn(self) -> int:
+        master_pid = os.getpid()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(master_pid)
+        self.children[pid] = time.monotonic()
+        return pid
+
+    def _run_worker(self, master_pid: int):
+        # uvicorn installs its own SIGTERM/SIGINT handlers; reloads are the master's job
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        registry.after_fork(master_pid)
+        code = 0
+        try:
+            config = uvicorn.Config(app, log_config=None, lifespan="on")
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except Exception as e:
+            logger.error(f"Worker {os.getpid()} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_reload_rules(self, signum, frame):
+        self.reload_rules_requested = True
+
+    def _on_reload_catalog(self, signum, frame):
+        self.reload_catalog_requested = True
+
+    def _sync_index(self, catalog_path: str):
+        # Encoding runs in a child process with its own torch state
+        try:
+            subprocess.run(
+                [sys.executable, "-m", "nlp_backend.embeddings.sync_index", "--catalog", catalog_path],
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"Index sync failed, changed pictograms keep their old vectors: {e}")
+
+    def reload(self):
+        """
+        Reloads what was requested (rules, catalog or both) in the master and
+        rolls the workers: each new worker is started before an old one is
+        told to stop.
+        """
+        rules, catalog = self.reload_rules_requested, self.reload_catalog_requested
+        self.reload_rules_requested = self.reload_catalog_requested = False
+        try:
+            if rules:
+                RuleService.get_instance().reload()
+            if catalog:
+                current = CatalogService.get_instance()
+                if current.semantic_engine is not None:
+                    self._sync_index(current.file_path)
+                CatalogService.reload(reindex=False)
+        except Exception as e:
+            logger.error(f"Reload failed, keeping the current workers: {e}")
+            return
+        gc.freeze()
+        for pid in list(self.children):
+            self.spawn()
+            self.children.pop(pid)
+            self.retiring.add(pid)
+            os.kill(pid, signal.SIGTERM)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {status}, starting a new one")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def run(self):
+        preload(self.data_path)
+        # Objects loaded so far are never collected: the GC then does not
+        # write to their pages in the workers
+        gc.collect()
+        gc.freeze()
+
+        self.sock = self.bind()
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload_rules)
+        signal.signal(signal.SIGUSR1, self._on_reload_catalog)
+
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info(f"Serving on {self.host}:{self.port} with {self.workers} workers (master {os.getpid()})")
+
+        while not self.stopping:
+            if self.reload_rules_requested or self.reload_catalog_requested:
+                self.reload()
+            self._reap()
+            time.sleep(0.2)
+
+        logger.info("Stopping workers...")
+        for pid in list(self.children) + list(self.retiring):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children) + list(self.retiring):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the backend with preloaded, forked workers.")
+    parser.add_argument("--host", default=os.environ.get("PICTOLINK_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PICTOLINK_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("PICTOLINK_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    args = parser.parse_args()
+
+    PreforkServer(args.host, args.port, args.workers, args.catalog).run()
@@ -1,17 +1,18 @@
 import httpx
 import logging
+import time
+
+from nlp_backend.services.metrics import EXTERNAL_CALLS, STAGE_SECONDS
+from nlp_backend.services.registry import registry
 
 logger = logging.getLogger(__name__)
 
 class ArasaacService:
-    _instance = None
     BASE_URL = "https://api.arasaac.org/api"
 
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        return registry.get(cls)
 
     async def generate_phrase(self, keywords: list[str]) -> str:
         """
@@ -29,6 +30,18 @@ class ArasaacService:
         
         url = f"{self.BASE_URL}/phrases/flex/es/{phrase_encoded}"
         
+        phrase = ""
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            phrase = await self._fetch_phrase(url)
+            outcome = "ok" if phrase else "empty"
+        finally:
+            STAGE_SECONDS.observe("arasaac", value=time.perf_counter() - start)
+            EXTERNAL_CALLS.inc("arasaac", outcome)
+        return phrase
+
+    async def _fetch_phrase(self, url: str) -> str:
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(url, timeout=5.0)
@@ -0,0 +1,62 @@
+import heapq
+import unicodedata
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Tuple
+
+
+def fold(text: str) -> str:
+    # Lowercase and drop accents (same normalization as the catalog index)
+    text = text.lower().strip()
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+
+class PrefixIndex:
+    """
+    Sorted array of accent-folded terms for ranked prefix completion.
+
+    Prefixes match the folded form, but every distinct spelling is kept and
+    returned with its own score ("papa" and "papá" are different words). Top-k lists for short prefixes, whose
+    ranges cover most of the catalog, are computed at build time; longer
+    prefixes rank their (small) bisect range on the fly.
+    """
+
+    def __init__(self, scores: Dict[str, float], limit: int = 10, cached_prefix_len: int = 2):
+        self.limit = limit
+        self.cached_prefix_len = cached_prefix_len
+
+        terms: Dict[str, float] = {}
+        for term, score in scores.items():
+            display = term.lower().strip()
+            if fold(display):
+                terms[display] = max(score, terms.get(display, score))
+
+        rows: List[Tuple[str, str]] = sorted((fold(display), display) for display in terms)
+        self.keys: List[str] = [folded for folded, _ in rows]
+        self.displays: List[str] = [display for _, display in rows]
+        self.scores: List[float] = [terms[display] for display in self.displays]
+
+        self._top: Dict[str, List[str]] = {}
+        prefixes = {k[:n] for k in self.keys for n in range(1, cached_prefix_len + 1)}
+        for prefix in prefixes:
+            self._top[prefix] = self._rank(prefix, limit)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _sort_key(self, row: int):
+        # Higher score first, then shorter, then alphabetical
+        return (-self.scores[row], len(self.keys[row]), self.keys[row], self.displays[row])
+
+    def _rank(self, prefix: str, limit: int) -> List[str]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_right(self.keys, prefix + '\uffff')
+        rows = heapq.nsmallest(limit, range(lo, hi), key=self._sort_key)
+        return [self.displays[row] for row in rows]
+
+    def complete(self, query: str, limit: int = 10) -> List[str]:
+        prefix = fold(query)
+        if not prefix:
+            return []
+        if len(prefix) <= self.cached_prefix_len and limit <= self.limit:
+            return self._top.get(prefix, [])[:limit]
+        return self._rank(prefix, limit)
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from nlp_backend.services.metrics import register_counter, register_gauge
+from nlp_backend.services.registry import registry
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional TTL (seconds, 0 = no expiry).
+
+    Entries belong to a version (e.g. catalog + rule tables); reading or
+    writing with a different version drops everything cached so far.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version: Hashable = None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: Hashable):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Hashable = None):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class TranslationCache(LRUCache):
+    """
+    Final pictogram id lists of /text-to-pictos keyed by whitespace-normalized input.
+    Size and TTL come from PICTOLINK_TRANSLATION_CACHE_SIZE and
+    PICTOLINK_TRANSLATION_CACHE_TTL.
+    """
+    per_process = True
+
+    def __init__(self):
+        super().__init__(
+            max_size=int(os.environ.get("PICTOLINK_TRANSLATION_CACHE_SIZE", 4096)),
+            ttl=float(os.environ.get("PICTOLINK_TRANSLATION_CACHE_TTL", 3600)),
+        )
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        # Repeated whitespace is not significant; case is (proper nouns, sentence
+        # starts), so inputs differing only in case are cached separately
+        return ' '.join(text.split())
+
+
+def _translation_samples(names: tuple) -> dict:
+    stats = TranslationCache.get_instance().stats()
+    return {(name,): stats[name] for name in names}
+
+
+register_gauge(
+    "pictolink_translation_cache",
+    "Translation cache size.",
+    ("stat",),
+    lambda: _translation_samples(("size",)),
+)
+register_counter(
+    "pictolink_translation_cache_events_total",
+    "Translation cache hits, misses, evictions, expirations and invalidations.",
+    ("event",),
+    lambda: _translation_samples(("hits", "misses", "evictions", "expirations", "invalidations")),
+)
@@ -1,144 +1,471 @@
 import json
+import logging
 import os
+import threading
+import unicodedata
 from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
+from nlp_backend.services.categories import CategoryIndex
+from nlp_backend.services.phrases import DEFAULT_PHRASES_PATH, PhraseMatcher, load_special_phrases
+from nlp_backend.services.ranking import index_source, load_index_vectors, metadata_prior, rank_terms
+from nlp_backend.services.registry import registry
+from nlp_backend.services.store import CatalogStore, PictogramRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'arasaac_catalog.jsonl')
+
+
+def snapshot_path_for(catalog_path: str) -> str:
+    # data/arasaac_catalog.jsonl -> data/arasaac_catalog.snapshot
+    return os.path.splitext(catalog_path)[0] + '.snapshot'
+
+
+# Lookup priority per catalog field (lower wins). A term resolves to the
+# pictograms of its best field, so a label hit is never displaced by a
+# synonym or keyword of another pictogram. Fields in other languages come
+# after all Spanish fields.
+PRIMARY_LANGUAGE = 'es'
+FIELD_PRIORITY = {'label': 0, 'synonym': 1, 'keyword': 2}
+OTHER_LANGUAGE_PRIORITY = len(FIELD_PRIORITY)
+
+# Ambiguous terms whose canonical ranking gap is below this are re-ranked
+# against the sentence embedding; others take the canonical pictogram
+RERANK_MARGIN = float(os.environ.get("PICTOLINK_RERANK_MARGIN", 0.1))
+
+
+def _fold(text: str) -> str:
+    # Remove accents/tildes
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+
+def _keywords(source: dict) -> List[str]:
+    # ARASAAC keyword entries: {"keyword": ..., "plural": ...} or plain strings
+    raw = source.get('raw') if isinstance(source.get('raw'), dict) else {}
+    entries = raw.get('keywords') or source.get('keywords') or []
+    words = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            words.extend(entry[k] for k in ('keyword', 'plural') if isinstance(entry.get(k), str))
+        elif isinstance(entry, str):
+            words.append(entry)
+    return words
+
+
+def _field_terms(data: dict, labels: Dict[str, str]):
+    """
+    (field, language, text) for every label, synonym and keyword of a
+    catalog record.
+    """
+    for lang, label in labels.items():
+        yield 'label', lang, label
+    synonyms = data.get('synonyms')
+    if isinstance(synonyms, dict):
+        for lang, words in synonyms.items():
+            for word in words if isinstance(words, list) else []:
+                if isinstance(word, str):
+                    yield 'synonym', lang, word
+    sources = data.get('sources')
+    if isinstance(sources, dict):
+        for lang, source in sources.items():
+            if isinstance(source, dict):
+                for word in _keywords(source):
+                    yield 'keyword', lang, word
+
+
+def _native_categories(data: dict) -> List[str]:
+    # ARASAAC categories of a record (sources.es.raw.categories)
+    source = (data.get('sources') or {}).get(PRIMARY_LANGUAGE) or {}
+    raw = source.get('raw') if isinstance(source.get('raw'), dict) else {}
+    categories = raw.get('categories') or source.get('categories') or []
+    return [c.strip() for c in categories if isinstance(c, str) and c.strip()]
+
+
+def field_priority(field: str, lang: str) -> int:
+    priority = FIELD_PRIORITY[field]
+    if lang != PRIMARY_LANGUAGE:
+        priority += OTHER_LANGUAGE_PRIORITY
+    return priority
+
+
+def read_catalog(file_path: str, vectors=None) -> CatalogStore:
+    """
+    Parses the JSONL catalog (the source of truth) into a CatalogStore and
+    ranks the candidates of ambiguous terms (see ranking.py), using the
+    pictogram `vectors` from ranking.load_index_vectors if given.
+    """
+    store = CatalogStore()
+    priors = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                labels = {str(k): str(v) for k, v in data.get('labels', {}).items()}
+                image_urls = {str(k): str(v) for k, v in data.get('image_urls', {}).items()}
+                row = store.append(int(data['id']), labels, image_urls)
+                
+                # Index labels, synonyms and keywords in every language
+                primary_terms = set()
+                for field, lang, text in _field_terms(data, labels):
+                    term = text.lower().strip()
+                    if not term:
+                        continue
+                    priority = field_priority(field, lang)
+                    store.add_term(term, row, priority)
+                    if priority < OTHER_LANGUAGE_PRIORITY:
+                        primary_terms.add(term)
+                    
+                    # Also index normalized version (remove accents/tildes)
+                    normalized = _fold(term)
+                    if normalized != term:
+                        store.add_term(normalized, row, priority, alias=True)
+                for category in _native_categories(data):
+                    store.add_category(category, row)
+                priors.append(metadata_prior(data, len(primary_terms)))
+                    
+            except Exception as e:
+                # A row appended before the error still needs its prior
+                if len(priors) < len(store.ids):
+                    priors.append(metadata_prior({}, 0))
+                continue
+    store.freeze()
+    ranked = rank_terms(store, priors, vectors)
+    logger.info(f"Ranked {ranked} ambiguous terms ({'with' if vectors else 'without'} embeddings).")
+    return store
+
+
+def index_prefix_for(catalog_path: str) -> str:
+    # The FAISS index is stored next to the catalog
+    return os.path.join(os.path.dirname(catalog_path), "faiss_index")
+
+
+def compile_catalog(file_path: str) -> Tuple[CatalogStore, Dict[str, str]]:
+    """
+    read_catalog with the embeddings of the saved FAISS index when there is
+    one. Also returns the source files the store depends on.
+    """
+    sources = catalog_sources(file_path)
+    vectors = load_index_vectors(index_prefix_for(file_path)) if "embeddings" in sources else None
+    return read_catalog(file_path, vectors), sources
+
+
+def catalog_sources(file_path: str) -> Dict[str, str]:
+    # Files a compiled catalog depends on, by role
+    sources = {"catalog": file_path}
+    index_path = index_source(index_prefix_for(file_path))
+    if index_path is not None:
+        sources["embeddings"] = index_path
+    return sources
 
 class Pictogram(BaseModel):
+    # Response shape of a catalog entry. The catalog itself keeps entries in
+    # a CatalogStore and hands out PictogramRecord views with the same fields.
     id: int
     labels: Dict[str, str]
     image_urls: Dict[str, str]
 
+def write_catalog_delta(file_path: str, upsert: List[dict], remove: List[int]) -> Dict[str, int]:
+    """
+    Applies added/changed records and removed ids to the JSONL catalog (the
+    source of truth), rewriting it atomically. Changed records replace the
+    line with the same id in place; new ones are appended.
+    """
+    pending = {int(record['id']): record for record in upsert}
+    removed = set(int(pid) for pid in remove) - set(pending)
+    counts = {"added": 0, "changed": 0, "removed": 0}
+    
+    tmp_path = f"{file_path}.tmp"
+    with open(file_path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+        for line in src:
+            try:
+                pid = int(json.loads(line)['id'])
+            except Exception:
+                dst.write(line)
+                continue
+            if pid in removed:
+                counts["removed"] += 1
+                continue
+            if pid in pending:
+                counts["changed"] += 1
+                line = json.dumps(pending.pop(pid), ensure_ascii=False) + "\n"
+            dst.write(line)
+        for record in pending.values():
+            counts["added"] += 1
+            dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, file_path)
+    return counts
+
 class CatalogService:
-    _instance = None
+    # Serializes reloads; requests never take it
+    _reload_lock = threading.RLock()
     
     def __init__(self):
-        self.index: Dict[str, List[Pictogram]] = {}
-        self.pictograms: Dict[int, Pictogram] = {}
+        self.file_path: Optional[str] = None
+        self.phrases_path = DEFAULT_PHRASES_PATH
+        self.store = CatalogStore()
+        self.phrase_matcher = PhraseMatcher({})
         self.loaded = False
         self.semantic_engine = None
+        self.fuzzy_index = None
+        self.prefix_index = None
+        self.categories = CategoryIndex()
+        # sha1 of the catalog file
+        self.checksum = ""
+        # Bumped whenever the catalog content (or the available strategies) changes
+        self.version = 0
         
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        return registry.get(cls)
         
-    def load_data(self, file_path: str):
+    def load_data(self, file_path: str, phrases_path: str = DEFAULT_PHRASES_PATH, with_semantic: bool = True):
+        """
+        Loads the catalog and its lexical indexes. The semantic engine is
+        loaded too unless with_semantic is False (the server loads it in
+        the background with load_semantic).
+        """
         if self.loaded:
             return
             
-        print(f"Loading catalog from {file_path}...")
+        self.file_path = file_path
+        self.phrases_path = phrases_path
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if not line.strip():
-                        continue
-                    try:
-                        data = json.loads(line)
-                        picto = Pictogram(
-                            id=data['id'],
-                            labels=data.get('labels', {}),
-                            image_urls=data.get('image_urls', {})
-                        )
-                        
-                        self.pictograms[picto.id] = picto
-                        
-                        # Index by Spanish label
-                        if 'es' in picto.labels:
-                            label = picto.labels['es'].lower()
-                            if label not in self.index:
-                                self.index[label] = []
-                            self.index[label].append(picto)
-                            
-                            # Also index normalized version (remove accents/tildes)
-                            import unicodedata
-                            normalized = ''.join(c for c in unicodedata.normalize('NFD', label) if unicodedata.category(c) != 'Mn')
-                            if normalized != label:
-                                if normalized not in self.index:
-                                    self.index[normalized] = []
-                                self.index[normalized].append(picto)
-                            
-                    except Exception as e:
-                        continue
+            self.store, phrases, self.checksum = self._load_store(file_path, phrases_path)
+            # Normalized once here instead of per request
+            self.phrase_matcher = PhraseMatcher(phrases)
+            self.categories = CategoryIndex.build(self.store, self.checksum)
+            self.build_fuzzy_index()
+            self.build_prefix_index()
             self.loaded = True
-            print(f"Loaded {len(self.pictograms)} pictograms.")
+            self.version += 1
+            logger.info(f"Loaded {len(self.store)} pictograms.")
+        except FileNotFoundError:
+            logger.error(f"Error: File {file_path} not found.")
+            return
             
-            # Initialize Semantic Search
+        if with_semantic:
             try:
-                from nlp_backend.embeddings.faiss_backend import FaissBackend
-                self.semantic_engine = FaissBackend()
-                
-                # Check if index exists
-                base_dir = os.path.dirname(file_path)
-                index_prefix = os.path.join(base_dir, "faiss_index")
-                
-                if self.semantic_engine.load(index_prefix):
-                    print("Semantic index loaded from disk.")
-                    self.semantic_engine.link_pictograms(self.pictograms)
-                else:
-                    print("Building semantic index (this may take a while)...")
-                    # Convert dict values to list
-                    all_pictograms = list(self.pictograms.values())
-                    self.semantic_engine.index_catalog(all_pictograms)
-                    self.semantic_engine.save(index_prefix)
-                    
+                self.load_semantic(file_path)
             except ImportError:
-                print("Warning: sentence-transformers or faiss not installed. Semantic search disabled.")
+                logger.warning("sentence-transformers or faiss not installed. Semantic search disabled.")
             except Exception as e:
-                print(f"Error initializing semantic search: {e}")
+                logger.error(f"Error initializing semantic search: {e}")
+
+    def load_semantic(self, file_path: str):
+        """
+        Loads the embedding model and the FAISS index stored next to the
+        catalog and switches semantic search on. A saved index is brought up
+        to date with the catalog by encoding only new or changed pictograms;
+        without a usable one the whole catalog is encoded.
+        Raises ImportError if sentence-transformers or faiss are missing.
+        """
+        from nlp_backend.embeddings.faiss_backend import FaissBackend
+        engine = FaissBackend()
+        index_prefix = index_prefix_for(file_path)
+        
+        if engine.load(index_prefix):
+            logger.info("Semantic index loaded from disk.")
+        else:
+            logger.info("Building semantic index (this may take a while)...")
+        counts = engine.sync(self.store)
+        if counts["removed"] or counts["added"]:
+            engine.save(index_prefix)
+            
+        # Requests only see the engine once it is complete. Translations
+        # cached before this point were made without semantic strategies.
+        self.semantic_engine = engine
+        self.version += 1
+
+    @classmethod
+    def reload(cls, reindex: bool = True) -> dict:
+        """
+        Rebuilds the catalog from its files into a new CatalogService and
+        swaps it in as the instance. Requests hold the instance they started
+        with, so they finish on a consistent old view. Semantic vectors are
+        reused for unchanged pictograms; only added or changed ones are
+        re-encoded. With reindex=False nothing is encoded: the semantic
+        index is reloaded as saved (the prefork master syncs it in a child
+        process first). Returns the delta against the previous catalog.
+        """
+        with cls._reload_lock:
+            current = cls.get_instance()
+            if current.file_path is None:
+                raise RuntimeError("Catalog was never loaded")
+            
+            fresh = cls()
+            fresh.version = current.version
+            fresh.load_data(current.file_path, current.phrases_path, with_semantic=False)
+            if not fresh.loaded:
+                raise FileNotFoundError(current.file_path)
+            
+            delta = cls._diff(current.store, fresh.store)
+            index_prefix = index_prefix_for(current.file_path)
+            if current.semantic_engine is not None and reindex:
+                # Only pictograms whose text changed are re-encoded
+                fresh.semantic_engine = current.semantic_engine.updated(fresh.store)
+                fresh.semantic_engine.save(index_prefix)
+            elif current.semantic_engine is not None:
+                fresh.semantic_engine = current.semantic_engine.reloaded(index_prefix, fresh.store)
                 
-        except FileNotFoundError:
-            print(f"Error: File {file_path} not found.")
+            registry.replace(cls, fresh)
+            
+        logger.info(
+            f"Catalog reloaded (version {fresh.version}): {len(delta['added'])} added, "
+            f"{len(delta['changed'])} changed, {len(delta['removed'])} removed"
+        )
+        return delta
+
+    @staticmethod
+    def _diff(old: CatalogStore, new: CatalogStore) -> Dict[str, List[int]]:
+        # Pictogram ids added, changed (labels or images) and removed
+        old_ids = set(old)
+        new_ids = set(new)
+        changed = [
+            pid for pid in new_ids & old_ids
+            if old[pid].labels != new[pid].labels or old[pid].image_urls != new[pid].image_urls
+        ]
+        return {
+            "added": sorted(new_ids - old_ids),
+            "changed": sorted(changed),
+            "removed": sorted(old_ids - new_ids),
+        }
+
+    def _load_store(self, file_path: str, phrases_path: str):
+        """
+        Maps the compiled snapshot next to the catalog when it is up to date
+        with the JSONL and phrase files; otherwise parses them and writes a
+        fresh snapshot for the next start. PICTOLINK_CATALOG_SNAPSHOT=0
+        always parses the JSONL. Returns (store, phrases, catalog sha1).
+        """
+        from nlp_backend.services import snapshot
+
+        use_snapshot = os.environ.get("PICTOLINK_CATALOG_SNAPSHOT", "1") != "0"
+        snapshot_path = snapshot_path_for(file_path)
+        sources = dict(catalog_sources(file_path), phrases=phrases_path)
+
+        if use_snapshot and os.path.exists(snapshot_path):
+            try:
+                if snapshot.is_fresh(snapshot.read_header(snapshot_path), sources):
+                    store, phrases, header = snapshot.load_snapshot(snapshot_path)
+                    logger.info(f"Catalog mapped from snapshot {snapshot_path}")
+                    return store, phrases, header["sources"]["catalog"]["sha1"]
+                logger.info("Catalog snapshot is stale, rebuilding it.")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable catalog snapshot: {e}")
 
-    def find_by_term(self, term: str) -> List[Pictogram]:
+        logger.info(f"Loading catalog from {file_path}...")
+        store, compiled_from = compile_catalog(file_path)
+        sources = dict(compiled_from, phrases=phrases_path)
+        phrases = load_special_phrases(phrases_path)
+        if use_snapshot:
+            try:
+                snapshot.write_snapshot(snapshot_path, store, phrases, sources)
+            except Exception as e:
+                logger.warning(f"Could not write catalog snapshot: {e}")
+        return store, phrases, snapshot.file_checksum(file_path)
+
+    def find_by_term(self, term: str, all_fields: bool = False) -> List[PictogramRecord]:
+        """
+        Pictograms whose best-priority field matches term exactly (e.g. the
+        label hits, if any, otherwise synonym hits...). all_fields returns
+        every match, best field first.
+        """
         term = term.lower().strip()
-        return self.index.get(term, [])
+        return self.store.records_for(term, best_only=not all_fields)
 
-    def find_fuzzy(self, term: str, threshold: int = 80) -> List[Pictogram]:
+    def term_priority(self, term: str) -> Optional[int]:
+        """
+        Priority of the best field term matches (see FIELD_PRIORITY; lower
+        is better), or None if it matches nothing.
+        """
+        return self.store.best_priority(term.lower().strip())
+
+    def is_close_call(self, term: str) -> bool:
+        """
+        True if the canonical first pictogram of an ambiguous term is not
+        clearly ahead of the next one, so the sentence should decide.
+        """
+        return self.store.margin(term.lower().strip()) < RERANK_MARGIN
+
+    def _primary_terms(self, spellings_only: bool = False) -> List[str]:
+        # Terms reachable through a Spanish field (fuzzy and autocomplete
+        # candidates; other languages are exact-match only). Autocomplete
+        # skips the accent-folded aliases: it folds for matching itself.
+        return [
+            term for term in self.store.terms
+            if self.store.best_priority(term) < OTHER_LANGUAGE_PRIORITY
+            and not (spellings_only and self.store.is_alias(term))
+        ]
+
+    def build_fuzzy_index(self):
+        from nlp_backend.services.fuzzy import FuzzyIndex
+        self.fuzzy_index = FuzzyIndex(self._primary_terms())
+
+    def build_prefix_index(self, usage: Optional[Dict[str, float]] = None):
+        """
+        Autocomplete ranks terms by their pictogram count, or by `usage`
+        (term -> frequency) when given.
+        """
+        from nlp_backend.services.autocomplete import PrefixIndex
+        scores = {term: float(self.store.count_for(term, best_only=True)) for term in self._primary_terms(spellings_only=True)}
+        if usage:
+            for term, frequency in usage.items():
+                if term in scores:
+                    scores[term] = float(frequency)
+        self.prefix_index = PrefixIndex(scores)
+
+    def find_fuzzy(self, term: str, threshold: int = 80) -> List[PictogramRecord]:
         """
         Find pictograms using fuzzy matching on the index keys.
         """
-        from thefuzz import process, fuzz
-        
         term = term.lower().strip()
         if not term:
             return []
+        if self.fuzzy_index is None:
+            self.build_fuzzy_index()
             
-        # Get top 3 matches using Ratio (stricter than partial)
-        matches = process.extract(term, self.index.keys(), limit=3, scorer=fuzz.ratio)
+        # Top 3 matches using Ratio (stricter than partial)
+        matches = self.fuzzy_index.extract(term, limit=3, threshold=threshold)
         
         results = []
         for match_term, score in matches:
-            if score >= threshold:
-                print(f"Fuzzy match: '{term}' -> '{match_term}' (score: {score})")
-                results.extend(self.index.get(match_term, []))
+            logger.debug(f"Fuzzy match: '{term}' -> '{match_term}' (score: {score})")
+            results.extend(self.store.records_for(match_term, best_only=True))
                 
         return results
 
-    def search_semantic(self, query: str, limit: int = 10) -> List[Tuple[Pictogram, float]]:
+    def search_semantic(self, query: str, limit: int = 10) -> List[Tuple[PictogramRecord, float]]:
         if not self.semantic_engine:
             return []
         return self.semantic_engine.search(query, limit)
 
+    def search_semantic_batch(self, queries: List[str], limit: int = 10) -> List[List[Tuple[PictogramRecord, float]]]:
+        """
+        One result list per query, computed with a single encode + search
+        (empty lists while semantic search is off).
+        """
+        engine = self.semantic_engine
+        if not engine or not queries:
+            return [[] for _ in queries]
+        return engine.search_batch(queries, limit)
+
     def search_autocomplete(self, query: str, limit: int = 10) -> List[str]:
         """
-        Returns a list of suggested terms starting with query.
+        Returns the top suggested terms starting with query (accent-insensitive).
         """
         query = query.lower().strip()
         if not query:
             return []
+        if self.prefix_index is None:
+            self.build_prefix_index()
             
-        suggestions = []
-        # Inefficient linear scan of keys (for MVP it's okay given ~10k keys)
-        # For production, use a Trie or prefix index.
-        count = 0
-        for key in self.index.keys():
-            if key.startswith(query):
-                suggestions.append(key)
-                count += 1
-                if count >= limit:
-                    break
-        return suggestions
+        return self.prefix_index.complete(query, limit)
         
-    def get_by_id(self, picto_id: int) -> Optional[Pictogram]:
-        return self.pictograms.get(picto_id)
+    def image_formats(self) -> List[str]:
+        # image_urls keys present in the catalog (png_color, svg_color, ...)
+        return list(self.store.url_columns)
+
+    def get_by_id(self, picto_id: int) -> Optional[PictogramRecord]:
+        return self.store.get(picto_id)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from nlp_backend.services.store import CatalogStore
+
+logger = logging.getLogger(__name__)
+
+# Curated categories generated offline by scripts/analyze_arasaac_catalog.py
+DEFAULT_CATEGORY_MAPPINGS_PATH = os.environ.get(
+    "PICTOLINK_CATEGORY_MAPPINGS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'analysis_results', 'category_mappings.json'),
+)
+
+CURATED = "curated"
+NATIVE = "native"
+
+
+class CategoryIndex:
+    """
+    Category name -> pictogram ids, from the curated mappings file and the
+    ARASAAC native categories kept in the catalog store. A curated category
+    hides a native one with the same name. Curated categories come first in
+    the listing, then native ones by size.
+
+    `checksum` identifies the content (catalog and mappings), so responses
+    built from the index can be cached under it.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, str] = {}
+        self.ids: Dict[str, List[int]] = {}
+        self.names: List[str] = []
+        self.checksum = ""
+
+    @classmethod
+    def build(cls, store: CatalogStore, catalog_checksum: str, mappings_path: Optional[str] = DEFAULT_CATEGORY_MAPPINGS_PATH) -> 'CategoryIndex':
+        index = cls()
+        digest = hashlib.sha1(catalog_checksum.encode('utf-8'))
+
+        curated = {}
+        if mappings_path and os.path.exists(mappings_path):
+            try:
+                with open(mappings_path, 'rb') as f:
+                    data = f.read()
+                curated = cls._parse_mappings(json.loads(data), mappings_path)
+                digest.update(data)
+            except Exception as e:
+                logger.error(f"Error loading category mappings {mappings_path}: {e}")
+                curated = {}
+
+        for name, picto_ids in curated.items():
+            # Ids missing from the catalog are dropped
+            index._add(name, CURATED, [pid for pid in picto_ids if pid in store])
+
+        native = sorted(store.categories, key=lambda name: (-len(store.category_rows_for(name)), name))
+        for name in native:
+            if name not in index.sources:
+                index._add(name, NATIVE, [store.ids[row] for row in store.category_rows_for(name)])
+
+        index.checksum = digest.hexdigest()
+        return index
+
+    @staticmethod
+    def _parse_mappings(raw, path: str) -> Dict[str, List[int]]:
+        # Entries are ids or {"id": ...} objects; malformed ones are skipped
+        if not isinstance(raw, dict):
+            raise ValueError("expected an object of category name -> ids")
+        mappings = {}
+        for name, entries in raw.items():
+            if not isinstance(entries, list):
+                logger.warning(f"Skipping category '{name}' in {path}: expected a list of ids")
+                continue
+            ids = []
+            for entry in entries:
+                try:
+                    ids.append(int(entry['id'] if isinstance(entry, dict) else entry))
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"Skipping invalid entry {entry!r} of category '{name}' in {path}")
+            mappings[name] = ids
+        return mappings
+
+    def _add(self, name: str, source: str, ids: List[int]):
+        self.sources[name] = source
+        self.ids[name] = ids
+        self.names.append(name)
+
+    def list(self, source: Optional[str] = None) -> List[str]:
+        return [name for name in self.names if source is None or self.sources[name] == source]
+
+    def get(self, name: str) -> Optional[List[int]]:
+        return self.ids.get(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
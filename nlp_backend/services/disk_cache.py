@@ -0,0 +1,115 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class DiskLRU:
+    """
+    Files in one directory with a total size limit; the least recently read
+    are removed first. Reads touch the file's mtime, so the order is
+    rebuilt from mtimes after a restart. Writes go through a temporary file,
+    so processes sharing the directory never read a partial file. Other
+    processes' writes are only seen by rescanning the directory, which is
+    done after every max_bytes/RESCAN_FRACTION bytes written here, so N
+    processes overshoot the limit by at most N such steps.
+    """
+    RESCAN_FRACTION = 16
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._unscanned_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                if key in self._entries:
+                    self.total_bytes -= self._entries.pop(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key not in self._entries:
+                # Written by another worker process
+                self.total_bytes += len(data)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        # Unique per call: threads of one process may write the same key
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._unscanned_bytes += len(data)
+            if self._unscanned_bytes >= self.max_bytes / self.RESCAN_FRACTION:
+                self._unscanned_bytes = 0
+                self._scan()
+            else:
+                self.total_bytes += len(data) - self._entries.pop(key, 0)
+                self._entries[key] = len(data)
+            while self.total_bytes > self.max_bytes and self._entries:
+                old, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from nlp_backend.services.metrics import register_counter, register_gauge
+from nlp_backend.services.registry import registry
+
+# Default pool layout. Each pool can be overridden with environment variables:
+#   PICTOLINK_POOL_<NAME>_WORKERS    number of workers
+#   PICTOLINK_POOL_<NAME>_MAX_QUEUE  calls allowed to wait beyond the workers
+# Pools are threads: the stages call the model singletons of this process,
+# which cannot be pickled to another one (spaCy, torch and FAISS release the
+# GIL for the heavy parts).
+DEFAULT_POOLS = {
+    "nlp": {"workers": 2, "max_queue": 64},
+    "semantic": {"workers": 2, "max_queue": 64},
+    "nlg": {"workers": 1, "max_queue": 16},
+}
+
+
+class PoolSaturatedError(RuntimeError):
+    pass
+
+
+class WorkerPool:
+    def __init__(self, name: str, workers: int = 1, max_queue: int = 0):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module does not spawn workers
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"pool-{self.name}")
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError(f"Pool '{self.name}' is saturated")
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        self._acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the call itself ends: a cancelled request leaves its
+        # thread running, and that thread still counts against the pool
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self.in_flight
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": min(in_flight, self.workers),
+                "queued": max(0, in_flight - self.workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class ExecutorService:
+    """
+    Bounded worker pools for the CPU-bound stages (spaCy, embeddings/FAISS,
+    fuzzy matching, mT5), so async handlers await them instead of blocking
+    the event loop.
+    """
+    # Threads do not survive fork: each worker process builds its own pools
+    per_process = True
+
+    def __init__(self, pools: Optional[Dict[str, dict]] = None):
+        self.pools: Dict[str, WorkerPool] = {}
+        for name, config in (pools or DEFAULT_POOLS).items():
+            config = self._apply_env(name, config)
+            self.pools[name] = WorkerPool(name, config["workers"], config["max_queue"])
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    @staticmethod
+    def _apply_env(name: str, config: dict) -> dict:
+        config = dict(config)
+        prefix = f"PICTOLINK_POOL_{name.upper()}_"
+        for key in ("workers", "max_queue"):
+            value = os.environ.get(prefix + key.upper())
+            if value:
+                config[key] = int(value)
+        return config
+
+    async def run(self, pool_name: str, fn: Callable, *args):
+        return await self.pools[pool_name].run(fn, *args)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown()
+
+
+def _pool_samples(field: str) -> dict:
+    return {(name,): stats[field] for name, stats in ExecutorService.get_instance().stats().items()}
+
+
+register_gauge("pictolink_pool_running", "Calls currently running per worker pool.", ("pool",), lambda: _pool_samples("running"))
+register_gauge("pictolink_pool_queued", "Calls waiting for a worker per pool.", ("pool",), lambda: _pool_samples("queued"))
+register_counter("pictolink_pool_rejected_total", "Calls rejected because the pool was saturated.", ("pool",), lambda: _pool_samples("rejected"))
@@ -0,0 +1,110 @@
+import unicodedata
+from typing import Iterable, List, Tuple
+
+import numpy as np
+# thefuzz is a thin wrapper over rapidfuzz; use its processor and the
+# unrounded ratio directly so ranking and ties match process.extract
+from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process as _process
+
+# Character histogram buckets: a-z, ñ, space, digits, everything else.
+# Accented letters share their base letter's bucket.
+_BUCKETS = 30
+
+
+def _bucket(c: str) -> int:
+    base = unicodedata.normalize('NFD', c)[0]
+    if 'a' <= base <= 'z':
+        return ord(base) - ord('a')
+    if c == 'ñ':
+        return 26
+    if c == ' ':
+        return 27
+    if c.isdigit():
+        return 28
+    return 29
+
+
+class FuzzyIndex:
+    """
+    Candidate filter over the catalog keys for fuzzy matching.
+
+    Returns the same results as thefuzz `process.extract(..., scorer=fuzz.ratio)`
+    followed by a score threshold, but only scores keys that can reach it.
+    fuzz.ratio is an indel distance d normalized by the total length, and d
+    is never smaller than the L1 distance between the two strings' character
+    histograms (merging letters into one bucket only lowers that bound).
+    Filtering on length and histogram distance is one vectorized pass and
+    never drops a key a full scan would have returned.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys: List[str] = []
+        self.processed: List[str] = []
+        self._bucket_cache = {}
+
+        for key in keys:
+            self.keys.append(key)
+            self.processed.append(_process(key))
+
+        # Rows sorted by length, so the length filter is a contiguous slice
+        self.order = np.array(sorted(range(len(self.keys)), key=lambda k: len(self.processed[k])), dtype=np.int32)
+        self.lengths = np.array([len(self.processed[k]) for k in self.order], dtype=np.int32)
+        # One row per bucket, so a query only touches the buckets it uses
+        self.histograms = np.zeros((_BUCKETS, len(self.keys)), dtype=np.int16)
+        for row, key_id in enumerate(self.order):
+            self.histograms[:, row] = self._histogram(self.processed[key_id])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _histogram(self, text: str) -> np.ndarray:
+        hist = np.zeros(_BUCKETS, dtype=np.int16)
+        for c in text:
+            bucket = self._bucket_cache.get(c)
+            if bucket is None:
+                bucket = self._bucket_cache[c] = _bucket(c)
+            hist[bucket] += 1
+        return hist
+
+    def extract(self, term: str, limit: int = 3, threshold: int = 0) -> List[Tuple[str, int]]:
+        """
+        Top `limit` (key, score) pairs with score >= threshold, best first.
+        Ties keep catalog key order, like thefuzz.
+        """
+        query = _process(term)
+        if not query or not self.keys:
+            return []
+
+        # Lowest similarity that can still round up to the threshold
+        min_sim = max(0.0, (threshold - 0.5) / 100)
+        query_len = len(query)
+
+        # ratio <= 2 * min(a, b) / (a + b) bounds the key length b
+        lo = 0
+        hi = len(self.lengths)
+        if min_sim > 0:
+            lo = np.searchsorted(self.lengths, query_len * min_sim / (2 - min_sim) - 1e-9, side='left')
+            hi = np.searchsorted(self.lengths, query_len * (2 - min_sim) / min_sim + 1e-9, side='right')
+        if lo >= hi:
+            return []
+
+        # The indel distance is at least the histogram distance
+        # |h - q|.sum() == len(key) + len(query) - 2 * min(h, q).sum()
+        lengths = self.lengths[lo:hi]
+        query_hist = self._histogram(query)
+        common = np.zeros(hi - lo, dtype=np.int32)
+        for bucket in np.nonzero(query_hist)[0]:
+            common += np.minimum(self.histograms[bucket, lo:hi], query_hist[bucket])
+        distance = lengths + query_len - 2 * common
+        max_edits = np.floor((lengths + query_len) * (1 - min_sim))
+        rows = np.nonzero(distance <= max_edits)[0] + lo
+
+        scored = []
+        for key_id in self.order[rows].tolist():
+            score = fuzz.ratio(query, self.processed[key_id])
+            if int(round(score)) >= threshold:
+                scored.append((-score, key_id))
+        scored.sort()
+
+        return [(self.keys[key_id], int(round(-neg_score))) for neg_score, key_id in scored[:limit]]
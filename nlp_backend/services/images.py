@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from nlp_backend.services.disk_cache import DiskLRU
+from nlp_backend.services.metrics import EXTERNAL_CALLS, STAGE_SECONDS, register_counter, register_gauge
+from nlp_backend.services.registry import registry
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("'Pillow' not found. Image thumbnails disabled, originals are served instead.")
+
+# Image proxy settings:
+#   PICTOLINK_IMAGE_CACHE_DIR   cache directory (default data/image_cache)
+#   PICTOLINK_IMAGE_CACHE_MB    size limit of the cached files
+#   PICTOLINK_IMAGE_ORIGIN      replaces scheme and host of the catalog image
+#                               URLs, e.g. a local mirror or test server
+#   PICTOLINK_IMAGE_PREFETCH    images of the top categories fetched at
+#                               startup (0 = off)
+#   PICTOLINK_IMAGE_PREFETCH_TIMEOUT
+#                               seconds the startup prefetch may take in all
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'image_cache')
+THUMBNAIL_SIZES = (64, 128, 256)
+# Keys of a catalog record's image_urls: png_color, svg_color, detail
+DEFAULT_IMAGE_FORMAT = "png_color"
+PREFETCH_CONCURRENCY = 8
+
+
+class ImageService:
+    """
+    Serves pictogram images from the disk cache, fetching misses from the
+    URLs in the catalog (concurrent requests for the same image share one
+    fetch). Thumbnails are resized from the cached original with Pillow.
+    """
+    # Holds an HTTP client bound to this process' event loop
+    per_process = True
+
+    def __init__(self):
+        self.cache = DiskLRU(
+            os.environ.get("PICTOLINK_IMAGE_CACHE_DIR", DEFAULT_IMAGE_CACHE_DIR),
+            int(float(os.environ.get("PICTOLINK_IMAGE_CACHE_MB", 256)) * 1024 * 1024),
+        )
+        self.origin = os.environ.get("PICTOLINK_IMAGE_ORIGIN", "").rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    def upstream_url(self, url: str) -> str:
+        if not self.origin:
+            return url
+        parts = urlsplit(url)
+        return self.origin + parts.path + (f"?{parts.query}" if parts.query else "")
+
+    @staticmethod
+    def _key(picto_id: int, url: str, size: Optional[int] = None) -> str:
+        # The URL hash keeps a replaced image from being served from cache
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        ext = os.path.splitext(urlsplit(url).path)[1] or '.bin'
+        if size:
+            return f"{picto_id}-{digest}-{size}.png"
+        return f"{picto_id}-{digest}{ext}"
+
+    @staticmethod
+    def media_type(url: str, size: Optional[int] = None) -> str:
+        if size and PIL_AVAILABLE:
+            return "image/png"
+        return mimetypes.guess_type(urlsplit(url).path)[0] or "application/octet-stream"
+
+    async def get(self, picto_id: int, url: str, size: Optional[int] = None) -> Optional[bytes]:
+        """
+        Image bytes for a pictogram's `url` (a thumbnail `size` pixels wide
+        when given and Pillow is installed), or None if the origin does not
+        have it.
+        """
+        if size and not PIL_AVAILABLE:
+            size = None
+        key = self._key(picto_id, url, size)
+        data = await asyncio.to_thread(self.cache.get, key)
+        if data is not None:
+            return data
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request doing the fetch was cancelled; fetch it here
+                return await self.get(picto_id, url, size)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            if size:
+                original = await self.get(picto_id, url)
+                data = await asyncio.to_thread(self._thumbnail, original, size) if original else None
+            else:
+                data = await self._fetch(url)
+            if data is not None:
+                await asyncio.to_thread(self.cache.put, key, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; nobody may be waiting
+            future.exception()
+            raise
+        finally:
+            # Cancelled before a result: release the waiters
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _thumbnail(data: bytes, size: int) -> bytes:
+        with Image.open(io.BytesIO(data)) as image:
+            image.thumbnail((size, size))
+            out = io.BytesIO()
+            image.save(out, format="PNG", optimize=True)
+            return out.getvalue()
+
+    async def _fetch(self, url: str) -> Optional[bytes]:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            response = await self._client.get(self.upstream_url(url))
+            if response.status_code == 404:
+                outcome = "empty"
+                return None
+            response.raise_for_status()
+            outcome = "ok"
+            return response.content
+        finally:
+            STAGE_SECONDS.observe("image_fetch", value=time.perf_counter() - start)
+            EXTERNAL_CALLS.inc("arasaac_images", outcome)
+
+    async def prefetch(self, images: Iterable[Tuple[int, str]]) -> int:
+        """
+        Fills the cache with the given (pictogram id, url) pairs, a few at a
+        time. Returns the number of images now cached.
+        """
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def one(picto_id: int, url: str) -> bool:
+            async with semaphore:
+                try:
+                    return await self.get(picto_id, url) is not None
+                except Exception as e:
+                    logger.debug(f"Prefetch of {url} failed: {e}")
+                    return False
+
+        results = await asyncio.gather(*(one(pid, url) for pid, url in images))
+        return sum(results)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+def prefetch_candidates(catalog, limit: int, fmt: str = DEFAULT_IMAGE_FORMAT) -> List[Tuple[int, str]]:
+    """
+    (id, url) of the first `limit` pictograms of the category listing:
+    curated categories (most used first), then native ones by size.
+    """
+    seen = set()
+    images = []
+    for name in catalog.categories.list():
+        for picto_id in catalog.categories.get(name):
+            if len(images) >= limit:
+                return images
+            if picto_id in seen:
+                continue
+            seen.add(picto_id)
+            picto = catalog.get_by_id(picto_id)
+            url = picto.image_urls.get(fmt) if picto else None
+            if url:
+                images.append((picto_id, url))
+    return images
+
+
+async def prefetch_images(catalog) -> int:
+    limit = int(os.environ.get("PICTOLINK_IMAGE_PREFETCH", 300))
+    if limit <= 0 or not catalog.loaded:
+        return 0
+    timeout = float(os.environ.get("PICTOLINK_IMAGE_PREFETCH_TIMEOUT", 30))
+    service = ImageService.get_instance()
+    images = prefetch_candidates(catalog, limit)
+    try:
+        # A slow origin must not hold up the startup (the preload blocks on it)
+        cached = await asyncio.wait_for(service.prefetch(images), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Image prefetch stopped after {timeout:g}s; remaining images are fetched on demand.")
+        return 0
+    logger.info(f"Prefetched {cached}/{len(images)} category images.")
+    return cached
+
+
+def _image_samples(names: tuple) -> dict:
+    service = registry.peek(ImageService)
+    stats = service.stats() if service is not None else {}
+    return {(name,): value for name, value in stats.items() if name in names}
+
+
+register_gauge("pictolink_image_cache", "Image cache entries and bytes.", ("stat",), lambda: _image_samples(("entries", "bytes")))
+register_counter(
+    "pictolink_image_cache_events_total",
+    "Image cache hits, misses and evictions.",
+    ("event",),
+    lambda: _image_samples(("hits", "misses", "evictions")),
+)
@@ -0,0 +1,166 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from nlp_backend.services.registry import registry
+
+# Latency buckets in seconds (Prometheus `le` bounds)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(total)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values: str, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *label_values: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*label_values, value=time.perf_counter() - start)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series):
+                    cumulative += count
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Gauge whose samples are read from a callback at scrape time.
+    The callback returns {label values tuple: value}.
+    """
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...], collect: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.collect = collect
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        try:
+            samples = self.collect()
+        except Exception:
+            samples = {}
+        for values, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {_format_value(value)}")
+        return lines
+
+
+class CollectedCounter(Gauge):
+    """
+    Counter whose running totals are kept by a service (e.g. cache hits)
+    and read from a callback at scrape time, like Gauge.
+    """
+    metric_type = "counter"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[object] = []
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry.get_instance()
+
+STAGE_SECONDS = _registry.register(Histogram(
+    "pictolink_stage_seconds",
+    "Time spent per translation stage and strategy.",
+    labels=("stage",),
+))
+STRATEGY_HITS = _registry.register(Counter(
+    "pictolink_strategy_hits_total",
+    "Tokens or spans resolved by each text-to-pictos strategy.",
+    labels=("strategy",),
+))
+EXTERNAL_CALLS = _registry.register(Counter(
+    "pictolink_external_calls_total",
+    "Calls to external services and their outcome.",
+    labels=("service", "outcome"),
+))
+
+
+def register_gauge(name: str, documentation: str, labels: Tuple[str, ...], collect: Callable[[], Dict[tuple, float]]) -> Optional[Gauge]:
+    return _registry.register(Gauge(name, documentation, labels, collect))
+
+
+def register_counter(name: str, documentation: str, labels: Tuple[str, ...], collect: Callable[[], Dict[tuple, float]]) -> Optional[CollectedCounter]:
+    return _registry.register(CollectedCounter(name, documentation, labels, collect))
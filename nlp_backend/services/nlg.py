@@ -1,40 +1,55 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
 try:
     import torch
     from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
-    print("Warning: 'torch' or 'transformers' not found. NLG model will be disabled.")
+    logger.warning("'torch' or 'transformers' not found. NLG model will be disabled.")
 
 from typing import List
 import os
+from nlp_backend.services.registry import registry
 
 class NLGService:
-    _instance = None
-    
-    def __init__(self):
+    def __init__(self, load_model: bool = True):
         self.model = None
         self.tokenizer = None
         
+        if load_model:
+            self.load_model()
+
+    def load_model(self):
+        """
+        Downloads/loads the mT5 model. Until it finishes (or if it fails),
+        generate_sentence uses the rule-based fallback. Returns True if the
+        model is loaded.
+        """
         if TRANSFORMERS_AVAILABLE:
             model_id = "ElarisDigitalSolutions/PictoLink"
-            print(f"Cargando modelo desde Hugging Face Hub: {model_id}")
+            logger.info(f"Cargando modelo desde Hugging Face Hub: {model_id}")
             
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(model_id)
-                self.model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
-                print("Modelo cargado correctamente.")
+                tokenizer = AutoTokenizer.from_pretrained(model_id)
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
+                # Tokenizer first: generate_sentence checks the model
+                self.tokenizer = tokenizer
+                self.model = model
+                logger.info("Modelo cargado correctamente.")
+                return True
             except Exception as e:
-                print(f"Error loading model from Hub: {e}")
-                print("Using rule-based fallback.")
+                logger.error(f"Error loading model from Hub: {e}")
+                logger.warning("Using rule-based fallback.")
         else:
-            print("Transformers library not available. Using rule-based fallback.")
+            logger.warning("Transformers library not available. Using rule-based fallback.")
+        return False
 
     @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+    def get_instance(cls, load_model: bool = True):
+        return registry.get(cls, lambda: cls(load_model=load_model))
 
     def generate_sentence(self, lemmas: List[str]) -> str:
         # Input preparation
@@ -55,8 +70,7 @@ class NLGService:
                     
                 generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
                 
-                with open("nlg_debug.log", "a", encoding="utf-8") as f:
-                    f.write(f"Raw output: '{generated_text}'\n")
+                logger.debug("NLG raw output: %r", generated_text)
                 
                 # Validation: Reject empty, single punctuation, or sentinel-like output
                 # Explicitly check for <extra_id_0> even if skip_special_tokens=True failed
@@ -66,13 +80,10 @@ class NLGService:
                     not generated_text.startswith("<")):
                     return self._post_process(generated_text)
                 else:
-                    with open("nlg_debug.log", "a", encoding="utf-8") as f:
-                        f.write("Output rejected. Using fallback.\n")
+                    logger.debug("NLG output rejected. Using fallback.")
                     
             except Exception as e:
-                with open("nlg_debug.log", "a", encoding="utf-8") as f:
-                    f.write(f"Error: {e}\n")
-                print(f"NLG Generation error: {e}")
+                logger.error(f"NLG Generation error: {e}")
         
         # Fallback if model missing or failed
         return self._fallback_generation(lemmas)
@@ -1,29 +1,50 @@
+import logging
 import spacy
 from typing import List
 
+from nlp_backend.services.metrics import STAGE_SECONDS
+from nlp_backend.services.registry import registry
+
+logger = logging.getLogger(__name__)
+
 class NLPService:
-    _instance = None
-    
     def __init__(self):
         try:
-            print("Loading SpaCy model 'es_core_news_sm'...")
+            logger.info("Loading SpaCy model 'es_core_news_sm'...")
             self.nlp = spacy.load("es_core_news_sm")
-            print("SpaCy model loaded.")
+            logger.info("SpaCy model loaded.")
         except OSError:
-            print("SpaCy model not found. Please run: python -m spacy download es_core_news_sm")
+            logger.error("SpaCy model not found. Please run: python -m spacy download es_core_news_sm")
             self.nlp = None
 
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        return registry.get(cls)
 
-    def process_text(self, text: str):
+    def process_text(self, text: str, offset: int = 0):
+        """
+        `offset` is added to each token's character position (for callers
+        that parse a slice of a larger text).
+        """
         if not self.nlp:
             return []
         
-        doc = self.nlp(text)
+        with STAGE_SECONDS.time("nlp_parse"):
+            doc = self.nlp(text)
+        return self._doc_to_tokens(doc, offset)
+
+    def process_texts(self, texts: List[str], batch_size: int = 64) -> List[list]:
+        """
+        Batched version of process_text using nlp.pipe.
+        """
+        if not self.nlp:
+            return [[] for _ in texts]
+        
+        with STAGE_SECONDS.time("nlp_parse_batch"):
+            docs = list(self.nlp.pipe(texts, batch_size=batch_size))
+        return [self._doc_to_tokens(doc) for doc in docs]
+
+    def _doc_to_tokens(self, doc, offset: int = 0):
         tokens = []
         for token in doc:
             # Basic filtering: ignore punctuation unless critical
@@ -32,6 +53,7 @@ class NLPService:
                     "text": token.text,
                     "lemma": token.lemma_,
                     "pos": token.pos_,
-                    "is_stop": token.is_stop
+                    "is_stop": token.is_stop,
+                    "idx": token.idx + offset
                 })
         return tokens
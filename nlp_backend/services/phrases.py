@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PHRASES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frases_especiales.json')
+
+
+def load_special_phrases(path: str = DEFAULT_PHRASES_PATH) -> Dict[str, List[str]]:
+    """
+    Reads frases_especiales.json (phrase -> pictogram ids). Returns an empty
+    table if the file is missing or invalid.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            phrases = json.load(f)
+        logger.debug("Loaded %d special phrases from %s", len(phrases), path)
+        return phrases
+    except Exception as e:
+        logger.error(f"Error loading special phrases: {e}")
+        return {}
+
+
+def normalize_text(text: str) -> str:
+    # Remove accents and lowercase
+    text = text.lower().strip()
+    text = ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+    # Keep only alphanumeric and spaces
+    text = ''.join(c for c in text if c.isalnum() or c.isspace())
+    # Collapse multiple spaces
+    text = ' '.join(text.split())
+    return text.strip()
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids', 'exact')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        # Ids of the first phrase (in file order) that normalizes to this node
+        self.ids: Optional[List[str]] = None
+        # Raw (lowercased) phrase -> ids, so an exact spelling wins over
+        # another phrase that only matches after normalization
+        self.exact: Dict[str, List[str]] = {}
+
+
+class PhraseMatcher:
+    """
+    Token-level trie over the normalized special phrases.
+
+    Phrases are normalized once when the matcher is built, so matching a
+    sentence costs one walk per start position regardless of how many
+    phrases are loaded.
+    """
+
+    def __init__(self, phrases: Dict[str, List[str]], max_tokens: int = 6):
+        self.max_tokens = max_tokens
+        self.root = _TrieNode()
+        self.size = 0
+        # Identifies this phrase set (e.g. for cache invalidation)
+        self.checksum = hashlib.sha1(json.dumps(phrases, sort_keys=True).encode('utf-8')).hexdigest()
+
+        for key, ids in phrases.items():
+            words = normalize_text(key).split()
+            if not words:
+                continue
+            node = self.root
+            for word in words:
+                child = node.children.get(word)
+                if child is None:
+                    child = _TrieNode()
+                    node.children[word] = child
+                node = child
+            if node.ids is None:
+                node.ids = ids
+            node.exact[key.lower()] = ids
+            self.size += 1
+
+    def match(self, tokens: List[str], start: int) -> Optional[Tuple[int, List[str]]]:
+        """
+        Returns (token_count, ids) for the longest phrase starting at
+        tokens[start], or None if no phrase matches.
+        """
+        node = self.root
+        best = None
+        end = min(len(tokens), start + self.max_tokens)
+
+        for j in range(start, end):
+            for word in normalize_text(tokens[j]).split():
+                node = node.children.get(word)
+                if node is None:
+                    break
+            if node is None:
+                break
+            if node is not self.root and node.ids is not None:
+                best = (j - start + 1, node)
+
+        if best is None:
+            return None
+
+        k, node = best
+        phrase_text = " ".join(tokens[start:start + k]).lower()
+        return k, node.exact.get(phrase_text, node.ids)
@@ -0,0 +1,144 @@
+import importlib.util
+import json
+import logging
+import math
+import os
+from typing import Dict, List, Optional
+
+from nlp_backend.services.store import CatalogStore
+
+logger = logging.getLogger(__name__)
+
+# Canonical pictogram per ambiguous term
+#
+# A term whose best field matches several pictograms ("agua" -> two
+# pictograms) used to resolve to the first one in file order, or to an
+# embedding re-rank against the sentence on every request. This pass ranks
+# each such candidate list once, when the catalog is compiled:
+#
+#   score = CENTRALITY_WEIGHT * centrality + (1 - CENTRALITY_WEIGHT) * prior
+#
+# centrality is the cosine between a candidate's vector and the centroid of
+# every pictogram indexed under the term (all fields), read from the FAISS
+# index stored next to the catalog; without one the prior alone decides.
+# It needs MIN_CENTRALITY_CANDIDATES vectors: two unit vectors are equally
+# close to their centroid, so for a pair it would only shrink the gap.
+# prior comes from catalog metadata (see metadata_prior). The ranked order
+# and the gap between the first two scores are stored in the snapshot; only
+# terms with a small gap are re-ranked against the sentence at request time.
+CENTRALITY_WEIGHT = 0.5
+MIN_CENTRALITY_CANDIDATES = 3
+CORE_CATEGORY = 'core vocabulary'
+
+
+def metadata_prior(data: dict, term_count: int) -> Dict[str, float]:
+    """
+    Raw prior signals of one catalog record: core vocabulary category,
+    ARASAAC download count (when the source has it) and how many Spanish
+    terms describe the pictogram. Normalized per candidate list by
+    rank_terms.
+    """
+    source = (data.get('sources') or {}).get('es') or {}
+    raw = source.get('raw') if isinstance(source.get('raw'), dict) else {}
+    categories = raw.get('categories') or source.get('categories') or []
+    downloads = raw.get('downloads')
+    return {
+        'core': 1.0 if any(CORE_CATEGORY in str(c) for c in categories) else 0.0,
+        'downloads': math.log1p(downloads) if isinstance(downloads, (int, float)) and downloads > 0 else 0.0,
+        'terms': math.log1p(term_count),
+    }
+
+
+def _prior_scores(signals: List[Dict[str, float]]) -> List[float]:
+    # Mean of the signals, each scaled to [0, 1] by the best candidate
+    scores = [0.0] * len(signals)
+    names = signals[0].keys() if signals else []
+    for name in names:
+        top = max(s[name] for s in signals)
+        if top <= 0:
+            continue
+        for k, s in enumerate(signals):
+            scores[k] += s[name] / top / len(names)
+    return scores
+
+
+def index_source(index_prefix: str) -> Optional[str]:
+    """
+    Path of the saved FAISS index if ranking can use it (it exists and
+    faiss is installed), else None.
+    """
+    index_path = f"{index_prefix}.index"
+    if os.path.exists(index_path) and os.path.exists(f"{index_prefix}.meta.json") and importlib.util.find_spec("faiss"):
+        return index_path
+    return None
+
+
+def load_index_vectors(index_prefix: str):
+    """
+    (pictogram id -> row, normalized vector matrix) from a saved FAISS
+    index, or None if there is none or faiss is not installed.
+    """
+    index_path = index_source(index_prefix)
+    if index_path is None:
+        return None
+    try:
+        if os.path.exists(f"{index_prefix}.vectors.npy") and os.path.exists(f"{index_prefix}.ids.npy"):
+            import numpy as np
+
+            # Saved by FaissBackend next to the index; mapped, not read
+            matrix = np.load(f"{index_prefix}.vectors.npy", mmap_mode='r')
+            row_ids = np.load(f"{index_prefix}.ids.npy")
+            return {int(pid): row for row, pid in enumerate(row_ids) if pid >= 0 and row < len(matrix)}, matrix
+
+        import faiss
+
+        index = faiss.read_index(index_path)
+        if hasattr(index, "make_direct_map"):
+            # IVF indexes need it for reconstruction
+            index.make_direct_map()
+        matrix = index.reconstruct_n(0, index.ntotal)
+        with open(f"{index_prefix}.meta.json", 'r') as f:
+            picto_ids = json.load(f)["picto_ids"]
+    except Exception as e:
+        logger.warning(f"Ranking without embeddings, cannot read {index_path}: {e}")
+        return None
+    return {pid: row for row, pid in enumerate(picto_ids) if row < len(matrix)}, matrix
+
+
+def rank_terms(store: CatalogStore, priors: List[Dict[str, float]], vectors=None) -> int:
+    """
+    Reorders the best tier of every ambiguous term of a frozen store by
+    canonical score and records the gap between its first two candidates.
+    `priors` holds metadata_prior per row. Returns the number of terms
+    ranked.
+    """
+    if vectors is not None:
+        import numpy as np
+        id_rows, matrix = vectors
+
+    ranked = 0
+    for term, slot in store.terms.items():
+        start, end = store.offsets[slot], store.best_ends[slot]
+        if end - start < 2:
+            continue
+        rows = list(store.postings[start:end])
+        scores = _prior_scores([priors[row] for row in rows])
+
+        if vectors is not None:
+            every = [id_rows.get(store.ids[row]) for row in store.postings[start:store.offsets[slot + 1]]]
+            every = [r for r in every if r is not None]
+            if len(every) >= MIN_CENTRALITY_CANDIDATES:
+                centroid = matrix[every].mean(axis=0)
+                norm = float(np.linalg.norm(centroid))
+                if norm > 0:
+                    centroid = centroid / norm
+                for k, row in enumerate(rows):
+                    r = id_rows.get(store.ids[row])
+                    centrality = float(matrix[r] @ centroid) if r is not None else 0.0
+                    scores[k] = CENTRALITY_WEIGHT * centrality + (1 - CENTRALITY_WEIGHT) * scores[k]
+
+        # Stable: equal scores keep catalog file order
+        order = sorted(range(len(rows)), key=lambda k: -scores[k])
+        store.set_ranking(slot, [rows[k] for k in order], scores[order[0]] - scores[order[1]])
+        ranked += 1
+    return ranked
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from nlp_backend.services.metrics import register_gauge
+from nlp_backend.services.registry import registry
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+# Optional component that cannot load here (missing library/model);
+# requests use the fallback path
+DISABLED = "disabled"
+FAILED = "failed"
+
+# Components needed before text-to-pictos can serve lexical lookups
+REQUIRED_COMPONENTS = ("rules", "nlp", "catalog")
+
+
+class ReadinessService:
+    """
+    Load state and load time per startup component, reported by /ready.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.components: Dict[str, dict] = {}
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    def register(self, name: str):
+        with self._lock:
+            self.components.setdefault(name, {"state": PENDING})
+
+    def start(self, name: str):
+        with self._lock:
+            self.components[name] = {"state": LOADING, "started_at": time.time(), "_start": time.perf_counter()}
+
+    def finish(self, name: str, state: str = READY, detail: Optional[str] = None):
+        with self._lock:
+            component = self.components.setdefault(name, {})
+            start = component.pop("_start", None)
+            component["state"] = state
+            if start is not None:
+                component["load_seconds"] = round(time.perf_counter() - start, 3)
+            if detail:
+                component["detail"] = detail
+
+    def state(self, name: str) -> str:
+        with self._lock:
+            return self.components.get(name, {}).get("state", PENDING)
+
+    def is_ready(self) -> bool:
+        """
+        True once every required component is ready.
+        """
+        return all(self.state(name) == READY for name in REQUIRED_COMPONENTS)
+
+    def report(self) -> dict:
+        with self._lock:
+            components = {
+                name: {k: v for k, v in component.items() if not k.startswith("_")}
+                for name, component in self.components.items()
+            }
+        return {"ready": self.is_ready(), "components": components}
+
+
+register_gauge(
+    "pictolink_component_ready",
+    "1 if the startup component is loaded, else 0.",
+    ("component",),
+    lambda: {
+        (name,): 1 if info["state"] == READY else 0
+        for name, info in ReadinessService.get_instance().report()["components"].items()
+    },
+)
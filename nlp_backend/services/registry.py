@@ -0,0 +1,91 @@
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServiceRegistry:
+    """
+    Process-wide service instances, replacing per-class `_instance`
+    singletons.
+
+    - get() creates a service on first use. Creation is serialized per
+      class, so concurrent first calls build it once (and a slow service,
+      e.g. spaCy, does not block lookups of the others).
+    - replace() swaps an instance in atomically (catalog reloads).
+    - close() shuts services down in reverse creation order, calling their
+      shutdown() if they have one.
+    - after_fork() runs in each forked worker: services marked
+      `per_process = True` (thread pools, ...) are dropped and recreated on
+      next use; read-only ones (models, indexes, catalog) stay shared with
+      the master copy-on-write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services: Dict[type, object] = {}
+        self._creating: Dict[type, threading.Lock] = {}
+        self._order: List[type] = []
+        # Pid of the preloading master in a forked worker, else None
+        self.master_pid: Optional[int] = None
+
+    def get(self, cls: Type[T], factory: Optional[Callable[[], T]] = None) -> T:
+        service = self._services.get(cls)
+        if service is not None:
+            return service
+
+        with self._lock:
+            creating = self._creating.setdefault(cls, threading.Lock())
+        with creating:
+            service = self._services.get(cls)
+            if service is None:
+                service = factory() if factory is not None else cls()
+                with self._lock:
+                    self._services[cls] = service
+                    self._order.append(cls)
+        return service
+
+    def peek(self, cls: Type[T]) -> Optional[T]:
+        # Instance if already created, without creating it
+        return self._services.get(cls)
+
+    def replace(self, cls: Type[T], service: T):
+        with self._lock:
+            if cls not in self._services:
+                self._order.append(cls)
+            self._services[cls] = service
+
+    def reset(self, cls: type):
+        with self._lock:
+            self._services.pop(cls, None)
+            if cls in self._order:
+                self._order.remove(cls)
+
+    def close(self):
+        with self._lock:
+            services = [(cls, self._services[cls]) for cls in reversed(self._order)]
+            self._services.clear()
+            self._order.clear()
+        for cls, service in services:
+            shutdown = getattr(service, "shutdown", None)
+            if callable(shutdown):
+                try:
+                    shutdown()
+                except Exception as e:
+                    logger.error(f"Error shutting down {cls.__name__}: {e}")
+
+    def after_fork(self, master_pid: int):
+        # Locks may have been held by master threads at fork time
+        self._lock = threading.Lock()
+        self._creating = {}
+        self.master_pid = master_pid
+        for cls in [c for c, s in self._services.items() if getattr(s, "per_process", False)]:
+            self.reset(cls)
+        logger.debug(f"Worker {os.getpid()} forked from {master_pid}")
+
+
+registry = ServiceRegistry()
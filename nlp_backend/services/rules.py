@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import List, Optional, Tuple
+from nlp_backend.services.registry import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'reglas_traduccion.json')
+
+
+class _SuffixIndex:
+    """
+    Suffix -> (rule position, value) lookup. Matching a word costs one dict
+    probe per distinct suffix length instead of one endswith() per rule.
+    """
+    __slots__ = ('rules', 'lengths', 'min_stem')
+
+    def __init__(self, pairs: List[List[str]], min_stem: int):
+        rules = {}
+        for position, (suffix, value) in enumerate(pairs):
+            rules.setdefault(suffix, (position, value))
+        self.rules = MappingProxyType(rules)
+        self.lengths = tuple(sorted({len(s) for s in rules}, reverse=True))
+        # Word must be longer than suffix + min_stem
+        self.min_stem = min_stem
+
+    def match(self, word: str) -> List[Tuple[str, str]]:
+        """
+        (suffix, value) pairs that apply to word, in rule file order.
+        """
+        found = []
+        for length in self.lengths:
+            if len(word) <= length + self.min_stem:
+                continue
+            rule = self.rules.get(word[-length:])
+            if rule is not None:
+                found.append((rule[0], word[-length:], rule[1]))
+        found.sort()
+        return [(suffix, value) for _, suffix, value in found]
+
+
+class RuleTables:
+    """
+    Immutable, compiled view of reglas_traduccion.json.
+    """
+    __slots__ = ('version', 'checksum', 'stopwords', 'priority_map', 'fallback_map', 'reflexives', 'diminutives')
+
+    def __init__(self, data: dict, checksum: str = ''):
+        self.version = data.get('version', 0)
+        self.checksum = checksum
+        self.stopwords = frozenset(data.get('stopwords', []))
+        self.priority_map = MappingProxyType(dict(data.get('priority_map', {})))
+        self.fallback_map = MappingProxyType(dict(data.get('fallback_map', {})))
+        self.reflexives = _SuffixIndex(data.get('reflexive_pronouns', []), min_stem=3)
+        self.diminutives = _SuffixIndex(data.get('diminutive_rules', []), min_stem=2)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RuleTables':
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return cls(json.loads(raw.decode('utf-8')), hashlib.sha1(raw).hexdigest())
+
+    def match_reflexive(self, word: str) -> List[Tuple[str, str]]:
+        return self.reflexives.match(word)
+
+    def match_diminutive(self, word: str) -> List[Tuple[str, str]]:
+        return self.diminutives.match(word)
+
+
+class RuleService:
+    """
+    Holds the current RuleTables. reload() compiles the file into a new
+    object and swaps the reference, so a request that already took
+    `tables` keeps a consistent view.
+    """
+    def __init__(self, path: str = DEFAULT_RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.tables = RuleTables({})
+        try:
+            self.tables = RuleTables.from_file(path)
+        except Exception as e:
+            logger.error(f"Error loading rule tables: {e}")
+
+    @classmethod
+    def get_instance(cls):
+        return registry.get(cls)
+
+    def reload(self, path: Optional[str] = None) -> RuleTables:
+        """
+        Recompiles the rule file. On error the current tables stay active.
+        """
+        with self._lock:
+            tables = RuleTables.from_file(path or self.path)
+            if path:
+                self.path = path
+            self.tables = tables
+        logger.info(f"Rule tables reloaded (version {tables.version})")
+        return tables
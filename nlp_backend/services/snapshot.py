@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from nlp_backend.services.store import CatalogStore
+
+logger = logging.getLogger(__name__)
+
+# Binary catalog snapshot
+#
+#   b"PLCATSNP" | uint32 header length | header JSON | sections
+#
+# The header holds the format version, the size/mtime/sha1 of every source
+# file and a table of sections (name -> offset, length). Sections are
+# 8-byte aligned so integer arrays can be read in place from the mapping.
+# Bump FORMAT_VERSION whenever the layout or the term normalization changes.
+MAGIC = b"PLCATSNP"
+FORMAT_VERSION = 7
+_ALIGN = 8
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _file_stamp(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _StringColumn:
+    """
+    Column of optional strings read from the mapped snapshot on access.
+    """
+    __slots__ = ('blob', 'offsets', 'present')
+
+    def __init__(self, blob: memoryview, offsets: memoryview, present: memoryview):
+        self.blob = blob
+        self.offsets = offsets
+        self.present = present
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        if not self.present[row]:
+            return None
+        return str(self.blob[self.offsets[row]:self.offsets[row + 1]], 'utf-8')
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+
+def _encode_strings(values: List[Optional[str]]) -> Tuple[bytes, array, bytes]:
+    offsets = array('q', [0])
+    present = bytearray(len(values))
+    chunks = []
+    size = 0
+    for row, value in enumerate(values):
+        if value is not None:
+            data = value.encode('utf-8')
+            chunks.append(data)
+            size += len(data)
+            present[row] = 1
+        offsets.append(size)
+    return b''.join(chunks), offsets, bytes(present)
+
+
+def write_snapshot(path: str, store: CatalogStore, phrases: Dict[str, List[str]], sources: Dict[str, str]):
+    """
+    Writes `store` and the special phrases to `path`. `sources` maps a role
+    ("catalog", "phrases", "embeddings") to the file the data was compiled
+    from.
+    """
+    terms = list(store.terms)
+    categories = list(store.categories)
+    if any('\x00' in name for name in terms + categories):
+        raise SnapshotError("Catalog term or category contains a NUL character")
+
+    sections: List[Tuple[str, bytes]] = [
+        ("ids", store.ids.tobytes()),
+        ("sorted_ids", store._sorted_ids.tobytes()),
+        ("sorted_rows", store._sorted_rows.tobytes()),
+        ("term_offsets", store.offsets.tobytes()),
+        ("postings", store.postings.tobytes()),
+        ("priorities", store.priorities.tobytes()),
+        ("best_ends", store.best_ends.tobytes()),
+        ("margins", store.margins.tobytes()),
+        ("aliases", store.aliases.tobytes()),
+        # Terms are stored in slot order and split on load
+        ("terms", '\x00'.join(terms).encode('utf-8')),
+        ("category_offsets", store.category_offsets.tobytes()),
+        ("category_rows", store.category_rows.tobytes()),
+        ("categories", '\x00'.join(categories).encode('utf-8')),
+        ("json_offsets", store.json_offsets.tobytes()),
+        ("json_blob", bytes(store.json_blob)),
+        ("phrases", json.dumps(phrases, ensure_ascii=False).encode('utf-8')),
+    ]
+    for prefix, columns in (("labels", store.label_columns), ("urls", store.url_columns)):
+        for name, column in columns.items():
+            blob, offsets, present = _encode_strings([column[row] for row in range(len(store.ids))])
+            sections.append((f"{prefix}.{name}.blob", blob))
+            sections.append((f"{prefix}.{name}.offsets", offsets.tobytes()))
+            sections.append((f"{prefix}.{name}.present", present))
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "count": len(store.ids),
+        "label_columns": list(store.label_columns),
+        "url_columns": list(store.url_columns),
+        "sources": {
+            role: dict(_file_stamp(source), sha1=file_checksum(source))
+            for role, source in sources.items()
+        },
+        "sections": {},
+    }
+
+    # Section offsets depend on the header size: lay out until it is stable
+    header_bytes = json.dumps(header).encode('utf-8')
+    while True:
+        position = _aligned(len(MAGIC) + 4 + len(header_bytes))
+        for name, data in sections:
+            header["sections"][name] = [position, len(data)]
+            position = _aligned(position + len(data))
+        laid_out = json.dumps(header).encode('utf-8')
+        if len(laid_out) == len(header_bytes):
+            header_bytes = laid_out
+            break
+        header_bytes = laid_out
+
+    # Unique per writer: several workers may rebuild a stale snapshot at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, data in sections:
+            f.write(b'\x00' * (header["sections"][name][0] - f.tell()))
+            f.write(data)
+    # Readers never see a half-written snapshot
+    os.replace(tmp_path, path)
+
+
+def _aligned(position: int) -> int:
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def read_header(path: str) -> dict:
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} is not a catalog snapshot")
+        (length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(length).decode('utf-8'))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot format {header.get('format_version')} != {FORMAT_VERSION}")
+    return header
+
+
+def is_fresh(header: dict, sources: Dict[str, str]) -> bool:
+    """
+    True if the snapshot was compiled from the current `sources`. Files
+    whose size and mtime match are trusted; otherwise their sha1 decides
+    (so a touched or copied but unchanged file does not force a rebuild).
+    """
+    recorded = header.get("sources", {})
+    if set(recorded) != set(sources):
+        return False
+    for role, source in sources.items():
+        if not os.path.exists(source):
+            return False
+        stamp = _file_stamp(source)
+        info = recorded[role]
+        if stamp["size"] != info.get("size"):
+            return False
+        if stamp["mtime_ns"] != info.get("mtime_ns") and file_checksum(source) != info.get("sha1"):
+            return False
+    return True
+
+
+def load_snapshot(path: str) -> Tuple[CatalogStore, Dict[str, List[str]], dict]:
+    """
+    Maps the snapshot and returns (store, special phrases, header). Integer
+    arrays and string columns are views over the mapping, so pages are
+    shared between workers and only touched when read.
+    """
+    header = read_header(path)
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    table = header["sections"]
+
+    def section(name: str) -> memoryview:
+        offset, length = table[name]
+        return view[offset:offset + length]
+
+    store = CatalogStore()
+    store.ids = section("ids").cast('q')
+    store._sorted_ids = section("sorted_ids").cast('q')
+    store._sorted_rows = section("sorted_rows").cast('q')
+    store.offsets = section("term_offsets").cast('q')
+    store.postings = section("postings").cast('q')
+    store.priorities = section("priorities").cast('b')
+    store.best_ends = section("best_ends").cast('q')
+    store.margins = section("margins").cast('f')
+    store.aliases = section("aliases").cast('b')
+    terms = str(section("terms"), 'utf-8').split('\x00') if table["terms"][1] else []
+    store.terms = dict(zip(terms, range(len(terms))))
+    store._building = None
+    store._spellings = None
+    store.category_offsets = section("category_offsets").cast('q')
+    store.category_rows = section("category_rows").cast('q')
+    categories = str(section("categories"), 'utf-8').split('\x00') if table["categories"][1] else []
+    store.categories = dict(zip(categories, range(len(categories))))
+    store._building_categories = None
+    store.json_offsets = section("json_offsets").cast('q')
+    store.json_blob = section("json_blob")
+
+    for prefix, names, columns in (
+        ("labels", header["label_columns"], store.label_columns),
+        ("urls", header["url_columns"], store.url_columns),
+    ):
+        for name in names:
+            columns[name] = _StringColumn(
+                section(f"{prefix}.{name}.blob"),
+                section(f"{prefix}.{name}.offsets").cast('q'),
+                section(f"{prefix}.{name}.present"),
+            )
+
+    phrases = json.loads(str(section("phrases"), 'utf-8'))
+    if len(store.ids) != header["count"]:
+        raise SnapshotError("Snapshot row count does not match its header")
+    return store, phrases, header
+
+
+def build_snapshot(catalog_path: str, phrases_path: str, out_path: str) -> dict:
+    """
+    Compiles the JSONL catalog and special phrases into `out_path`, ranking
+    ambiguous terms with the FAISS index next to the catalog if present.
+    """
+    from nlp_backend.services.catalog import compile_catalog
+    from nlp_backend.services.phrases import load_special_phrases
+
+    store, sources = compile_catalog(catalog_path)
+    phrases = load_special_phrases(phrases_path)
+    write_snapshot(out_path, store, phrases, dict(sources, phrases=phrases_path))
+    return read_header(out_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from nlp_backend.services.catalog import DEFAULT_CATALOG_PATH, snapshot_path_for
+    from nlp_backend.services.phrases import DEFAULT_PHRASES_PATH
+
+    parser = argparse.ArgumentParser(description="Compile the catalog into a binary snapshot.")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH)
+    parser.add_argument("--phrases", default=DEFAULT_PHRASES_PATH)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    out = args.out or snapshot_path_for(args.catalog)
+    header = build_snapshot(args.catalog, args.phrases, out)
+    print(f"Wrote {out}: {header['count']} pictograms, {len(header['sections'])} sections")
@@ -0,0 +1,267 @@
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+# Stands in for the pictogram id inside interned image URL templates
+_ID_MARK = '\x00'
+
+
+def encode_json(value) -> bytes:
+    # Same output as the JSON responses (compact, UTF-8 kept as is)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class PictogramRecord:
+    """
+    Read-only view of one catalog row. Has the same attributes as the
+    Pictogram model, which is only built when a response is serialized.
+    """
+    __slots__ = ('store', 'row', 'id')
+
+    def __init__(self, store: 'CatalogStore', row: int):
+        self.store = store
+        self.row = row
+        self.id = store.ids[row]
+
+    @property
+    def labels(self) -> Dict[str, str]:
+        return self.store.labels_of(self.row)
+
+    @property
+    def image_urls(self) -> Dict[str, str]:
+        return self.store.image_urls_of(self.row)
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "labels": self.labels, "image_urls": self.image_urls}
+
+    def json(self) -> bytes:
+        # as_dict() encoded as in API responses, built when the store froze
+        return self.store.json_of(self.row)
+
+    def __eq__(self, other):
+        if isinstance(other, PictogramRecord):
+            return self.id == other.id and self.store is other.store
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"PictogramRecord(id={self.id}, labels={self.labels!r})"
+
+
+class CatalogStore(Mapping):
+    """
+    Columnar pictogram table: one int array of ids, one column of interned
+    strings per label language and image format (URLs are stored as shared
+    templates with the id cut out), and the term index as CSR postings
+    (term -> slot, slot -> row offsets in one int array).
+
+    Each posting carries the priority of the field it came from (lower is
+    better, see catalog.FIELD_PRIORITY). A term's postings are ordered by
+    priority, then catalog file order, and `best_ends` marks where its
+    best tier ends. When the best tier holds several pictograms, it is kept
+    in canonical order (see ranking.py) and `margins` holds the score gap
+    between its first two. `aliases` flags terms that only exist as the
+    accent-folded form of another spelling ("camion" for "camión"). ARASAAC categories are kept the same way as the
+    terms (name -> slot, slot -> rows), and the response JSON of every row
+    is encoded once into a single blob. Behaves as a read-only id -> record
+    mapping.
+    """
+
+    def __init__(self):
+        self.ids = array('q')
+        self.label_columns: Dict[str, List[Optional[str]]] = {}
+        self.url_columns: Dict[str, List[Optional[str]]] = {}
+        self.terms: Dict[str, int] = {}
+        self.offsets = array('q', [0])
+        self.postings = array('q')
+        self.priorities = array('b')
+        self.best_ends = array('q')
+        self.margins = array('f')
+        self.aliases = array('b')
+        self.categories: Dict[str, int] = {}
+        self.category_offsets = array('q', [0])
+        self.category_rows = array('q')
+        self._building_categories: Optional[Dict[str, List[int]]] = {}
+        self.json_blob = b''
+        self.json_offsets = array('q', [0])
+        self._sorted_ids = array('q')
+        self._sorted_rows = array('q')
+        self._building: Optional[Dict[str, Dict[int, int]]] = {}
+        self._spellings: Optional[set] = set()
+
+    def append(self, picto_id: int, labels: Dict[str, str], image_urls: Dict[str, str]) -> int:
+        row = len(self.ids)
+        self.ids.append(picto_id)
+        self._set_row(self.label_columns, row, {lang: sys.intern(text) for lang, text in labels.items()})
+        key = str(picto_id)
+        self._set_row(self.url_columns, row, {fmt: sys.intern(url.replace(key, _ID_MARK)) for fmt, url in image_urls.items()})
+        return row
+
+    @staticmethod
+    def _set_row(columns: Dict[str, List[Optional[str]]], row: int, values: Dict[str, str]):
+        for name in values:
+            if name not in columns:
+                columns[name] = [None] * row
+        for name, column in columns.items():
+            column.append(values.get(name))
+
+    def add_term(self, term: str, row: int, priority: int = 0, alias: bool = False):
+        if not alias:
+            self._spellings.add(term)
+        rows = self._building.setdefault(sys.intern(term), {})
+        # A row reachable through several fields keeps its best one
+        if priority < rows.get(row, priority + 1):
+            rows[row] = priority
+
+    def add_category(self, name: str, row: int):
+        rows = self._building_categories.setdefault(sys.intern(name), [])
+        if not rows or rows[-1] != row:
+            rows.append(row)
+
+    def freeze(self):
+        """
+        Packs the collected terms into the postings arrays. Call once after
+        the last append/add_term. A repeated id replaces the earlier rows
+        (last wins, as with the old id -> object dict): they stay in the
+        columns but leave the terms, categories and iteration.
+        """
+        last_rows = {picto_id: row for row, picto_id in enumerate(self.ids)}
+        live = set(last_rows.values()) if len(last_rows) < len(self.ids) else None
+
+        for term, rows in self._building.items():
+            if live is not None:
+                rows = {row: priority for row, priority in rows.items() if row in live}
+                if not rows:
+                    continue
+            self.terms[term] = len(self.offsets) - 1
+            ranked = sorted(rows.items(), key=lambda item: (item[1], item[0]))
+            best = ranked[0][1]
+            tier = sum(1 for _, priority in ranked if priority == best)
+            self.best_ends.append(len(self.postings) + tier)
+            # Unranked ties always count as close
+            self.margins.append(float('inf') if tier == 1 else 0.0)
+            self.aliases.append(0 if term in self._spellings else 1)
+            self.postings.extend(row for row, _ in ranked)
+            self.priorities.extend(priority for _, priority in ranked)
+            self.offsets.append(len(self.postings))
+        self._building = None
+        self._spellings = None
+
+        for name, rows in self._building_categories.items():
+            if live is not None:
+                rows = [row for row in rows if row in live]
+                if not rows:
+                    continue
+            self.categories[name] = len(self.category_offsets) - 1
+            self.category_rows.extend(rows)
+            self.category_offsets.append(len(self.category_rows))
+        self._building_categories = None
+
+        chunks = [encode_json(PictogramRecord(self, row).as_dict()) for row in range(len(self.ids))]
+        for chunk in chunks:
+            self.json_offsets.append(self.json_offsets[-1] + len(chunk))
+        self.json_blob = b''.join(chunks)
+
+        order = sorted(last_rows.values(), key=self.ids.__getitem__)
+        self._sorted_ids = array('q', (self.ids[row] for row in order))
+        self._sorted_rows = array('q', order)
+
+    def set_ranking(self, slot: int, rows: List[int], margin: float):
+        """
+        Stores the canonical order of a term's best tier (same rows,
+        reordered) and the score gap between its first two rows.
+        """
+        start = self.offsets[slot]
+        self.postings[start:start + len(rows)] = array('q', rows)
+        self.margins[slot] = margin
+
+    def row_of(self, picto_id: int) -> Optional[int]:
+        pos = bisect_left(self._sorted_ids, picto_id)
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == picto_id:
+            return self._sorted_rows[pos]
+        return None
+
+    def _bounds(self, slot: int, best_only: bool):
+        return self.offsets[slot], self.best_ends[slot] if best_only else self.offsets[slot + 1]
+
+    def rows_for(self, term: str, best_only: bool = False) -> array:
+        """
+        Rows indexed under term, best field first. With best_only, only the
+        rows from the term's highest-priority field.
+        """
+        slot = self.terms.get(term)
+        if slot is None:
+            return array('q')
+        start, end = self._bounds(slot, best_only)
+        return self.postings[start:end]
+
+    def count_for(self, term: str, best_only: bool = False) -> int:
+        slot = self.terms.get(term)
+        if slot is None:
+            return 0
+        start, end = self._bounds(slot, best_only)
+        return end - start
+
+    def best_priority(self, term: str) -> Optional[int]:
+        slot = self.terms.get(term)
+        return None if slot is None else self.priorities[self.offsets[slot]]
+
+    def is_alias(self, term: str) -> bool:
+        slot = self.terms.get(term)
+        return slot is not None and bool(self.aliases[slot])
+
+    def margin(self, term: str) -> float:
+        """
+        Score gap between the term's two best candidates (inf if it has a
+        single one, 0 if it was never ranked).
+        """
+        slot = self.terms.get(term)
+        return float('inf') if slot is None else self.margins[slot]
+
+    def records_for(self, term: str, best_only: bool = False) -> List[PictogramRecord]:
+        return [PictogramRecord(self, row) for row in self.rows_for(term, best_only)]
+
+    def category_rows_for(self, name: str) -> array:
+        # Rows of an ARASAAC category, in catalog file order
+        slot = self.categories.get(name)
+        if slot is None:
+            return array('q')
+        return self.category_rows[self.category_offsets[slot]:self.category_offsets[slot + 1]]
+
+    def json_of(self, row: int):
+        # bytes, or a view of the mapped snapshot
+        return self.json_blob[self.json_offsets[row]:self.json_offsets[row + 1]]
+
+    def labels_of(self, row: int) -> Dict[str, str]:
+        return {lang: column[row] for lang, column in self.label_columns.items() if column[row] is not None}
+
+    def image_urls_of(self, row: int) -> Dict[str, str]:
+        key = str(self.ids[row])
+        return {fmt: column[row].replace(_ID_MARK, key) for fmt, column in self.url_columns.items() if column[row] is not None}
+
+    def __getitem__(self, picto_id: int) -> PictogramRecord:
+        row = self.row_of(picto_id)
+        if row is None:
+            raise KeyError(picto_id)
+        return PictogramRecord(self, row)
+
+    def __contains__(self, picto_id) -> bool:
+        try:
+            return self.row_of(picto_id) is not None
+        except TypeError:
+            return False
+
+    # Iteration skips rows replaced by a repeated id, in id order
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._sorted_ids)
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids)
+
+    def records(self) -> List[PictogramRecord]:
+        return [PictogramRecord(self, row) for row in self._sorted_rows]
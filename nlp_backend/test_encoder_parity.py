@@ -0,0 +1,51 @@
+import sys
+import os
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("sentence_transformers")
+
+from nlp_backend.embeddings.encoders import PARITY_THRESHOLDS, RUNTIMES, configured_model_name, cosine_parity, encode_normalized, load_encoder
+from nlp_backend.embeddings.encoder_benchmark import SENTENCES
+
+TEXTS = SENTENCES + ["agua", "baño", "mamá", "comer", "dormir", "feliz", "triste", "escuela"]
+
+def test_encoder_parity():
+    # Runtimes to check, e.g. PICTOLINK_PARITY_RUNTIMES=onnx,int8
+    runtimes = os.environ.get("PICTOLINK_PARITY_RUNTIMES", ",".join(r for r in RUNTIMES if r != "torch")).split(",")
+    model_name = configured_model_name()
+    reference_model, _ = load_encoder(model_name, "torch")
+    reference = encode_normalized(reference_model, TEXTS)
+
+    failures = []
+    skipped = []
+    for runtime in runtimes:
+        model, used = load_encoder(model_name, runtime)
+        if used != runtime:
+            print(f"SKIPPED: {runtime} runtime not available.")
+            skipped.append(runtime)
+            continue
+        parity = cosine_parity(reference, encode_normalized(model, TEXTS))
+        worst = TEXTS[int(parity.argmin())]
+        print(f"{runtime}: cosine mean {parity.mean():.4f}, min {parity.min():.4f} ('{worst}')")
+        if parity.min() < PARITY_THRESHOLDS[runtime]:
+            failures.append(runtime)
+
+    if failures:
+        print(f"FAILURE: embeddings diverge from PyTorch for {failures}.")
+    elif len(skipped) == len(runtimes):
+        print("SKIPPED: none of the runtimes is available.")
+    else:
+        print("SUCCESS: all available runtimes match the PyTorch embeddings.")
+    assert not failures
+    if skipped:
+        pytest.skip(f"runtimes not available: {', '.join(skipped)}")
+
+if __name__ == "__main__":
+    try:
+        test_encoder_parity()
+    except pytest.skip.Exception as e:
+        print(e)
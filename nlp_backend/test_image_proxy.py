@@ -0,0 +1,115 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+from nlp_backend.main import app
+from nlp_backend.services.catalog import CatalogService
+from nlp_backend.services.disk_cache import DiskLRU
+from nlp_backend.services.images import ImageService
+from nlp_backend.services.registry import registry
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"\x00" * 1000
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_origin(directory: str) -> ThreadingHTTPServer:
+    # Local stand-in for the ARASAAC static server
+    os.makedirs(os.path.join(directory, "pictograms", "2349"))
+    with open(os.path.join(directory, "pictograms", "2349", "2349_500.png"), "wb") as f:
+        f.write(IMAGE)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def fetch_images(port: int, cache_dir: str):
+    os.environ["PICTOLINK_IMAGE_ORIGIN"] = f"http://127.0.0.1:{port}"
+    os.environ["PICTOLINK_IMAGE_CACHE_DIR"] = cache_dir
+    service = ImageService()
+    url = "https://static.arasaac.org/pictograms/2349/2349_500.png"
+    try:
+        first = await asyncio.gather(*(service.get(2349, url) for _ in range(5)))
+        cached = await service.get(2349, url)
+        missing = await service.get(1, "https://static.arasaac.org/pictograms/1/1_500.png")
+    finally:
+        await service.aclose()
+    return first, cached, missing, service.stats()
+
+def test_image_proxy():
+    with tempfile.TemporaryDirectory() as origin_dir, tempfile.TemporaryDirectory() as cache_dir:
+        server = start_origin(origin_dir)
+        try:
+            first, cached, missing, stats = asyncio.run(fetch_images(server.server_address[1], cache_dir))
+        finally:
+            server.shutdown()
+
+    ok = all(data == IMAGE for data in first) and cached == IMAGE and missing is None and stats["hits"] >= 1
+    print("SUCCESS: images fetched from the origin and served from the cache." if ok else f"FAILURE: {stats}")
+    assert ok
+
+def write_catalog(directory: str) -> str:
+    # image_urls keys as in the real catalog
+    path = os.path.join(directory, "arasaac_catalog.jsonl")
+    base = "https://static.arasaac.org/pictograms/2349/2349"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "id": 2349,
+            "labels": {"es": "perro"},
+            "image_urls": {"png_color": f"{base}_500.png", "svg_color": f"{base}.svg", "detail": f"{base}_detail.png"},
+        }) + "\n")
+    return path
+
+def test_image_route():
+    with tempfile.TemporaryDirectory() as origin_dir, tempfile.TemporaryDirectory() as cache_dir:
+        server = start_origin(origin_dir)
+        os.environ["PICTOLINK_IMAGE_ORIGIN"] = f"http://127.0.0.1:{server.server_address[1]}"
+        os.environ["PICTOLINK_IMAGE_CACHE_DIR"] = cache_dir
+        catalog = CatalogService()
+        catalog.load_data(write_catalog(cache_dir), with_semantic=False)
+        registry.replace(CatalogService, catalog)
+        registry.replace(ImageService, ImageService())
+        client = TestClient(app)
+        try:
+            default = client.get("/api/v1/pictograms/2349/image")
+            unknown = client.get("/api/v1/pictograms/2349/image", params={"format": "png"})
+            missing = client.get("/api/v1/pictograms/2349/image", params={"format": "detail"})
+            cached = client.get("/api/v1/pictograms/2349/image", params={"format": "png_color"})
+        finally:
+            server.shutdown()
+            registry.reset(ImageService)
+            registry.reset(CatalogService)
+
+    statuses = [r.status_code for r in (default, unknown, missing, cached)]
+    ok = statuses == [200, 400, 404, 200] and default.content == IMAGE and cached.content == IMAGE
+    print("SUCCESS: image route serves png_color and rejects unknown formats." if ok else f"FAILURE: {statuses}")
+    assert ok
+
+def test_shared_cache_limit():
+    # Several workers writing to one directory stay near the shared limit
+    with tempfile.TemporaryDirectory() as cache_dir:
+        max_bytes = 64 * 1024
+        workers = [DiskLRU(cache_dir, max_bytes) for _ in range(4)]
+        for i in range(200):
+            workers[i % len(workers)].put(f"{i}.png", b"x" * 1024)
+        on_disk = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+
+    limit = max_bytes + len(workers) * max_bytes / DiskLRU.RESCAN_FRACTION
+    ok = on_disk <= limit
+    print(f"SUCCESS: {on_disk} bytes cached for a {max_bytes} byte limit." if ok else f"FAILURE: {on_disk} bytes cached, limit {max_bytes}.")
+    assert ok
+
+if __name__ == "__main__":
+    test_image_proxy()
+    test_image_route()
+    test_shared_cache_limit()
@@ -0,0 +1,47 @@
+import sys
+import os
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from nlp_backend.services.ranking import rank_terms
+from nlp_backend.services.store import CatalogStore
+
+def build_store(count: int) -> CatalogStore:
+    # `count` pictograms under the label "agua", ids 1..count
+    store = CatalogStore()
+    for picto_id in range(1, count + 1):
+        row = store.append(picto_id, {'es': 'agua'}, {})
+        store.add_term('agua', row)
+    store.freeze()
+    return store
+
+def ranked_ids(store: CatalogStore) -> list:
+    return [record.id for record in store.records_for('agua', best_only=True)]
+
+def test_pair_ranked_by_prior():
+    # Centrality cannot tell two candidates apart: the prior decides and
+    # the gap is the prior's, not shrunk by a constant centrality
+    store = build_store(2)
+    priors = [{'core': 0.0}, {'core': 1.0}]
+    vectors = ({1: 0, 2: 1}, np.eye(2, dtype=np.float32))
+    rank_terms(store, priors, vectors)
+    ok = ranked_ids(store) == [2, 1] and store.margin('agua') == 1.0
+    print("SUCCESS: pair ranked by its prior." if ok else f"FAILURE: {ranked_ids(store)}, margin {store.margin('agua')}")
+    assert ok
+
+def test_centrality_with_three_candidates():
+    # The candidate closest to the others is the canonical one
+    store = build_store(3)
+    priors = [{'core': 0.0}] * 3
+    matrix = np.array([[1.0, 0.0], [0.8, 0.6], [0.6, 0.8]], dtype=np.float32)
+    rank_terms(store, priors, ({1: 0, 2: 1, 3: 2}, matrix))
+    ok = ranked_ids(store)[0] == 2 and store.margin('agua') > 0
+    print("SUCCESS: most central candidate ranked first." if ok else f"FAILURE: {ranked_ids(store)}")
+    assert ok
+
+if __name__ == "__main__":
+    test_pair_ranked_by_prior()
+    test_centrality_with_three_candidates()
@@ -0,0 +1,75 @@
+import sys
+import os
+import json
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+START_TIMEOUT = 300
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def write_catalog(directory: str) -> str:
+    path = os.path.join(directory, "arasaac_catalog.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for picto_id, label in ((2248, "agua"), (6456, "comer"), (2349, "perro")):
+            f.write(json.dumps({
+                "id": picto_id,
+                "labels": {"es": label},
+                "image_urls": {"png_color": f"https://static.arasaac.org/pictograms/{picto_id}/{picto_id}_500.png"},
+            }) + "\n")
+    return path
+
+def wait_healthy(port: int, master: subprocess.Popen, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and master.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def test_server_start_reload_stop():
+    # Starts the preload-and-fork server, reloads rules (SIGHUP) and
+    # catalog (SIGUSR1), and stops it with SIGTERM
+    with tempfile.TemporaryDirectory() as directory:
+        port = free_port()
+        env = dict(os.environ, PICTOLINK_IMAGE_PREFETCH="0")
+        master = subprocess.Popen(
+            [sys.executable, "-m", "nlp_backend.server", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", "2", "--catalog", write_catalog(directory)],
+            cwd=ROOT, env=env,
+        )
+        try:
+            ok = wait_healthy(port, master, START_TIMEOUT)
+            for sig in (signal.SIGHUP, signal.SIGUSR1):
+                if not ok:
+                    break
+                master.send_signal(sig)
+                time.sleep(2)
+                ok = master.poll() is None and wait_healthy(port, master, START_TIMEOUT)
+            master.send_signal(signal.SIGTERM)
+            code = master.wait(timeout=60)
+        finally:
+            if master.poll() is None:
+                master.kill()
+
+    ok = ok and code == 0
+    print("SUCCESS: server started, reloaded and stopped." if ok else f"FAILURE: server exited with {master.returncode}.")
+    assert ok
+
+if __name__ == "__main__":
+    test_server_start_reload_stop()